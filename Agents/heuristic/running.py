@@ -7,11 +7,10 @@
 
 # IMPORTS ------------------------------------------------------------------------------------------------------------#
 
-from copy import deepcopy
-from ExtendedFormGame.template import Agent, GameRules, GameState
+from ExtendedFormGame.template import Action, Agent, GameRules, GameState
 import random
 
-from backgammon_model import BackgammonRules
+from BackgammonGame.backgammon_model import BackgammonRules, BackgammonState
 
 # CONSTANTS ----------------------------------------------------------------------------------------------------------#
 
@@ -38,21 +37,7 @@ class myAgent(Agent):
             Action: Selected action instance.
         """
 
-        # Initialise heuristic values.
-        min_h: float = float("inf")
-        min_actions: list[tuple] = []
-
-        # Access heuristic values.
-        for action in actions:
-            tmp_h = self.heuristic(game_state, action)
-            if tmp_h < min_h:
-                min_h = tmp_h
-                min_actions = [action]
-            elif tmp_h == min_h:
-                min_actions.append(action)
-        
-        # Select heuristic maximising action
-        return random.choice(min_actions)
+        return select_running_action(self.game_rules, game_state, self.id)
     
     def heuristic(self, game_state:GameState,
                   action:tuple) -> float:
@@ -68,7 +53,7 @@ class myAgent(Agent):
         Returns:
             float: heuristic value
         """
-        tmp_game_state = deepcopy(game_state)
+        tmp_game_state = game_state.clone()
         game_state_prime = self.game_rules.generate_successor(tmp_game_state,
                                                               action,
                                                               self.id)
@@ -95,4 +80,45 @@ class myAgent(Agent):
         """
         # Do nothing - not a learning-based approach.
         return None
+
+# FUNC DEF -----------------------------------------------------------------------------------------------------------#
+
+def select_running_action(game_rules:BackgammonRules,
+                          game_state:BackgammonState,
+                          agent_id:int) -> Action:
+    """select_running_action
+    Returns the action with the least heuristic value of the change in
+    the agent's pip count, breaking ties at random.
+
+    Args:
+        game_rules (BackgammonRules): Rules of the game.
+        game_state (BackgammonState): Game state s.
+        agent_id (int): Agent ID.
+
+    Returns:
+        Action: Selected action instance.
+    """
+    # Evaluate a single action for each distinct outcome position,
+    # with the afterstates reached in the play tree.
+    afterstates = game_rules.get_legal_afterstates(
+        game_state, agent_id, unique_positions=True)
+    score:float = game_rules.calculate_score(game_state, agent_id)
+
+    # Initialise heuristic values.
+    min_h: float = float("inf")
+    min_actions: list[tuple] = []
+
+    # Access heuristic values, as in heuristic, but from the
+    # afterstates rather than a successor generated per action.
+    for action, afterstate in afterstates:
+        tmp_h = score - game_rules.calculate_score(afterstate, agent_id)
+        if tmp_h < min_h:
+            min_h = tmp_h
+            min_actions = [action]
+        elif tmp_h == min_h:
+            min_actions.append(action)
+
+    # Select heuristic maximising action
+    return random.choice(min_actions)
+
 # END ---------------------------------------------------------------- #
\ No newline at end of file
@@ -13,7 +13,6 @@
 
 from collections import defaultdict
 from operator import add
-from copy import deepcopy
 from types import FunctionType
 import random
 
@@ -113,7 +112,7 @@ class MultiAgentNode():
             MultiAgentNode: Child node.
         """
         # Generate next game_state and reward for achieving that game_state.
-        next_game_state:GameState = self.mdp.get_next_state(deepcopy(self.game_state),
+        next_game_state:GameState = self.mdp.get_next_state(self.game_state.clone(),
                                                             action, self.agent_id)
         reward:list[float] = [float(0.0), float(0.0)] # TECH DEBT: Hard coding two-player limitations here.
         reward[self.agent_id] = self.mdp.get_reward(self.game_state,
@@ -129,7 +128,7 @@ class MultiAgentNode():
                     
         # Create a new node for new child
         next_agent_id = 1 if self.agent_id == 0 else 0
-        new_child = MultiAgentNode(self.mdp, self, deepcopy(next_game_state),
+        new_child = MultiAgentNode(self.mdp, self, next_game_state.clone(),
                                    self.qfunction, self.bandit, next_agent_id,
                                    reward, action, self.simulation_depth)
         # Add child node into parent's list of children.
@@ -190,12 +189,14 @@ class MultiAgentNode():
 
         action = child.action
 
-        # Update visit counter.
-        MultiAgentNode.visits[self.game_state] += 1
-        MultiAgentNode.visits[(action, self.game_state)] += 1
+        # Update visit counter, keyed on the Zobrist key of the position
+        # rather than the mutable game state.
+        position:int = self.game_state.zobrist_key
+        MultiAgentNode.visits[position] += 1
+        MultiAgentNode.visits[(str(action), position)] += 1
         
         # Update Q-function.
-        delta = ((1 / (MultiAgentNode.visits[(action, self.game_state)]))
+        delta = ((1 / (MultiAgentNode.visits[(str(action), position)]))
                  * (reward[self.agent_id]
                     -self.qfunction.get_q_value(self.game_state, action)))
         self.qfunction.update(self.game_state, action, delta)
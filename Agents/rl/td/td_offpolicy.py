@@ -73,7 +73,7 @@ class OffPolicyTDAgent(Agent):
 
         # Update state, action storage for learning.
         self.last_action = deepcopy(action)
-        self.last_state = deepcopy(game_state)
+        self.last_state = game_state.clone()
 
         # Update turn.
         self.turn += 1
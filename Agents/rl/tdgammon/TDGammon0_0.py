@@ -12,12 +12,11 @@
 
 # IMPORTS ------------------------------------------------------------ #
 
-from Agents.rl.tdgammon.TDGammonMDP import TDGammonMDP
+from Agents.rl.tdgammon.TDGammonMDP import TDGammonMDP, select_greedy_index
 from Agents.rl.tdgammon.TDGammonNN import TDGammonNNQFunction 
 from BackgammonGame.backgammon_model import BackgammonRules, BackgammonState
 from pathlib import PureWindowsPath
 from ExtendedFormGame import utils
-import random
 
 from ExtendedFormGame.template import Agent
 
@@ -59,29 +58,33 @@ class myAgent(Agent):
         # Turn on eval mode.
         self.qfunction.nn.eval()
         
-        # Select the highest estimated outcome state value.
-        max_value:float = float("-inf")
-        max_actions:list[tuple] = []
-
-        for a in actions:
-            tmp_game_state_p:BackgammonState = self.mdp.get_next_state(game_state, a, self.id)
-            tmp_value:float = self.qfunction.get_q_value(tmp_game_state_p, None)[self.id]
-            if tmp_value > max_value:
-                max_value = tmp_value
-                max_actions = [a]
-            elif tmp_value == max_value:
-                max_actions.append(a)
-
-        action:tuple = random.choice(max_actions)
-
-        # Update Q-Function.
+        # Evaluate a single action for each distinct outcome position,
+        # with the afterstates reached in the play tree.
+        actions, afterstates = zip(*self.game_rules.get_legal_afterstates(
+            game_state, self.id, unique_positions=True))
+        afterstates:list[BackgammonState] = list(afterstates)
+
+        # Evaluate the current state, and the afterstate of every
+        # action, in a single batch.
+        values, hidden = self.qfunction.get_q_values(
+            [game_state] + afterstates, return_hidden=True)
+
+        # Select the highest estimated outcome state value, breaking
+        # only exact ties, as in TD-Gammon self-play.
+        index:int = select_greedy_index(values[1:, self.id], tie_ulps=0)
+        action:tuple = actions[index]
+
+        # Update Q-Function, reusing the chosen afterstate and the
+        # values and activations from the batch.
         self.qfunction.nn.train()
-        next_game_state:BackgammonState = self.mdp.get_next_state(game_state, action, self.id)
+        next_game_state:BackgammonState = afterstates[index]
         reward:float = self.mdp.get_reward(game_state, next_game_state, action, self.id)
         if reward == 1:
             print("reward winning")
         self.qfunction.update(game_state, next_game_state, None,
-                                  reward, self.mdp.gamma, self.id)
+                                  reward, self.mdp.gamma, self.id,
+                                  val_p=values[index + 1], val=values[0],
+                                  hidden=hidden[0])
 
         # Update turn.
         self.turn += 1
@@ -101,12 +104,17 @@ class myAgent(Agent):
         utils.raiseNotDefined
         return 0
     
-    def save_weights(self, filepath:str) -> None:
+    def save_weights(self, filepath:str, save_traces:bool = True) -> None:
         """save_weights
         Save training weights for learning-based agents.
+
+        Args:
+            filepath (str): Filename to save the weights to.
+            save_traces (bool, optional): Whether to save the eligibility
+            traces. Defaults to True.
         """
         file_str:PureWindowsPath = PureWindowsPath(myAgent.policy_path,
                                                    filepath+myAgent.policy_filetype)
-        self.qfunction.save_policy(file_str)
+        self.qfunction.save_policy(file_str, save_traces)
 
 # END ---------------------------------------------------------------- #
\ No newline at end of file
@@ -0,0 +1,222 @@
+# INFORMATION -------------------------------------------------------- #
+
+# Author:  Josh Vaughan
+# Date:    18/10/2026
+# Purpose: Implements an actor/learner pipeline for TD-Gammon self-play
+#          training, where actor processes play games with a snapshot
+#          of the weights, and a single learner updates the weights
+#          from the trajectories of the games.
+
+# IMPORTS ------------------------------------------------------------ #
+
+from datetime import datetime
+import queue
+import random
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from Agents.rl.tdgammon.TDGammonMDP import select_greedy_index
+from Agents.rl.tdgammon.TDGammonNN import TDGammonNN, TDGammonNNQFunction
+from BackgammonGame.backgammon_model import BackgammonRules, BackgammonState
+from BackgammonGame.playout import Policy, playout
+from ExtendedFormGame.template import Action
+
+# CONSTANTS ---------------------------------------------------------- #
+
+LEARNER_BATCH_SIZE:int = 8 # Maximum number of games per update.
+ACTOR_JOIN_TIMEOUT:float = 1.0 # Seconds between draining trajectories.
+
+# CLASS DEF ---------------------------------------------------------- #
+
+class WeightSnapshot():
+
+    def __init__(self, nn:TDGammonNN) -> None:
+        """__init__
+        Initialise a snapshot of the weights of a network in shared
+        memory, published by the learner and read by the actors, with
+        a version incremented on each publish.
+
+        Args:
+            nn (TDGammonNN): Network to take the snapshot of.
+        """
+        self.flat_params:torch.Tensor = nn.flat_params.clone().share_memory_()
+        self.version = mp.Value("i", 0, lock=False)
+        self.lock = mp.Lock()
+
+    def publish(self, nn:TDGammonNN) -> None:
+        """publish
+        Copies the weights of the network into the snapshot, as a new
+        version.
+
+        Args:
+            nn (TDGammonNN): Network of the learner.
+        """
+        with self.lock:
+            self.flat_params.copy_(nn.flat_params)
+            self.version.value += 1
+
+    def refresh(self, nn:TDGammonNN, version:int) -> int:
+        """refresh
+        Copies the snapshot into the weights of the network, if the
+        snapshot is newer than the version held by the network.
+
+        Args:
+            nn (TDGammonNN): Network of an actor.
+            version (int): Version held by the network.
+
+        Returns:
+            int: Version held by the network after the refresh.
+        """
+        if self.version.value == version:
+            return version
+        with self.lock:
+            nn.flat_params.copy_(self.flat_params)
+            version = self.version.value
+        nn.version += 1
+        return version
+
+# FUNC DEF ----------------------------------------------------------- #
+
+def afterstate_policy(game_rules:BackgammonRules,
+                      qfunction:TDGammonNNQFunction) -> Policy:
+    """afterstate_policy
+    Returns a policy playing the action whose afterstate has the highest
+    estimated value for the agent, as the TD-Gammon agents do, breaking
+    only exact ties at random.
+
+    Args:
+        game_rules (BackgammonRules): Rules of the game.
+        qfunction (TDGammonNNQFunction): Q-function of the agents.
+
+    Returns:
+        Policy: Greedy afterstate policy.
+    """
+    def policy(game_state:BackgammonState, agent_id:int) -> Action:
+        actions, afterstates = zip(*game_rules.get_legal_afterstates(
+            game_state, agent_id, unique_positions=True))
+        values:np.ndarray = qfunction.get_q_values(list(afterstates))
+        return actions[select_greedy_index(values[:, agent_id],
+                                           tie_ulps=0)]
+    return policy
+
+def start_actors(snapshot:WeightSnapshot, hidden_features:int,
+                 seed:int, num_actors:int) -> tuple[list, mp.Queue, mp.Event]:
+    """start_actors
+    Starts actor processes playing self-play games with the published
+    weights.
+
+    Args:
+        snapshot (WeightSnapshot): Weights published by the learner.
+        hidden_features (int): Number of hidden units of the network.
+        seed (int): Integer for random seed, from which the seed of each
+        actor is derived.
+        num_actors (int): Number of actor processes.
+
+    Returns:
+        tuple[list, mp.Queue, mp.Event]: The actor processes, the queue
+        of trajectories, and the event stopping the actors.
+    """
+    random.seed(seed)
+    actor_seeds:list[float] = [random.random() for _ in range(num_actors)]
+
+    trajectories:mp.Queue = mp.Queue()
+    stop:mp.Event = mp.Event()
+    actors:list = []
+    for actor_id in range(num_actors):
+        actor = mp.Process(target=self_play_actor,
+                           args=(actor_id, snapshot, hidden_features,
+                                 actor_seeds[actor_id], trajectories, stop),
+                           daemon=True)
+        actor.start()
+        actors.append(actor)
+    return (actors, trajectories, stop)
+
+def stop_actors(actors:list, trajectories:mp.Queue,
+                stop:mp.Event) -> None:
+    """stop_actors
+    Stops the actor processes once their current games end, discarding
+    the trajectories of those games.
+
+    Args:
+        actors (list): The actor processes.
+        trajectories (mp.Queue): Queue of trajectories.
+        stop (mp.Event): Event stopping the actors.
+    """
+    stop.set()
+    for actor in actors:
+        # Drain the trajectories, so actors are not blocked on a full
+        # queue.
+        while actor.is_alive():
+            try:
+                trajectories.get(timeout=ACTOR_JOIN_TIMEOUT)
+            except queue.Empty:
+                pass
+        actor.join()
+
+def self_play_actor(actor_id:int, snapshot:WeightSnapshot,
+                    hidden_features:int, seed:float,
+                    trajectories:mp.Queue, stop:mp.Event) -> None:
+    """self_play_actor
+    Plays self-play games until stopped, refreshing the weights from the
+    snapshot before each game. Each game is reported as a tuple of the
+    actor ID, the version of the weights, the game seed, the position
+    IDs at the start of the game and after each turn, the scores, and
+    the elapsed episode time.
+
+    Args:
+        actor_id (int): ID of the actor.
+        snapshot (WeightSnapshot): Weights published by the learner.
+        hidden_features (int): Number of hidden units of the network.
+        seed (float): Random seed of the actor.
+        trajectories (mp.Queue): Queue of trajectories.
+        stop (mp.Event): Event stopping the actor.
+    """
+    # Parallelism comes from the actors, so each uses a single thread.
+    torch.set_num_threads(1)
+    random.seed(seed)
+
+    game_rules:BackgammonRules = BackgammonRules()
+    qfunction:TDGammonNNQFunction = TDGammonNNQFunction(hidden_features)
+    qfunction.nn.eval()
+    policy:Policy = afterstate_policy(game_rules, qfunction)
+    version:int = -1
+
+    while not stop.is_set():
+        version = snapshot.refresh(qfunction.nn, version)
+        start:datetime = datetime.now()
+
+        # Play game, seeded so it can be replayed with the same weights.
+        tmp_seed:float = random.random()
+        random.seed(tmp_seed)
+        result:dict = playout(game_rules, [policy, policy],
+                              record_trajectory=True)
+        trajectories.put((actor_id, version, tmp_seed, result["trajectory"],
+                          result["scores"], datetime.now() - start))
+
+def get_trajectory_batch(trajectories:mp.Queue, batch_size:int,
+                         timeout:float) -> list[tuple]:
+    """get_trajectory_batch
+    Returns the trajectories waiting in the queue, up to the batch size,
+    waiting for at least one.
+
+    Args:
+        trajectories (mp.Queue): Queue of trajectories.
+        batch_size (int): Maximum number of trajectories.
+        timeout (float): Seconds to wait for the first trajectory.
+
+    Raises:
+        queue.Empty: No trajectory arrived before the timeout.
+
+    Returns:
+        list[tuple]: Trajectories, as reported by self_play_actor.
+    """
+    batch:list[tuple] = [trajectories.get(timeout=timeout)]
+    while len(batch) < batch_size:
+        try:
+            batch.append(trajectories.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+# END FILE ----------------------------------------------------------- #
@@ -0,0 +1,76 @@
+# INFORMATION -------------------------------------------------------- #
+
+# Author:  Josh Vaughan
+# Date:    18/10/2026
+# Purpose: Implements a cache of TD-Gammon position evaluations, shared
+#          by the PyTorch and NumPy Q-functions.
+
+# IMPORTS ------------------------------------------------------------ #
+
+from typing import Callable
+import numpy as np
+
+from BackgammonGame.backgammon_model import BackgammonState
+from ExtendedFormGame.utils import LRUCache
+
+# CONSTANTS ---------------------------------------------------------- #
+
+EVAL_CACHE_CAPACITY:int = 2 ** 16
+
+# CLASS DEF ---------------------------------------------------------- #
+
+class EvaluationCache(LRUCache):
+
+    def __init__(self, capacity:int = EVAL_CACHE_CAPACITY) -> None:
+        """__init__
+        Initialise an LRU cache of position evaluations, keyed by the
+        Zobrist key of the position, and tagged with the version of the
+        model that produced them. Evaluations do not depend on the dice,
+        so positions reached with different dice share an entry.
+
+        Args:
+            capacity (int, optional): Maximum number of positions.
+            Defaults to EVAL_CACHE_CAPACITY.
+        """
+        super().__init__(capacity)
+        self.version:int = None
+
+    def get_q_values(self, game_states:list[BackgammonState],
+                     version:int,
+                     evaluate:Callable[[list[BackgammonState]], np.ndarray]) -> np.ndarray:
+        """get_q_values
+        Returns Q-values for a list of states, evaluating the states
+        missing from the cache in a single batch. The cache is cleared
+        when the model version changes.
+
+        Args:
+            game_states (list[BackgammonState]): States s.
+            version (int): Version of the model.
+            evaluate (Callable): Returns the Q-values of a list of
+            states, as an array of shape (N, NUM_TDGAMMON_OUTPUT).
+
+        Returns:
+            np.ndarray: Array of shape (N, NUM_TDGAMMON_OUTPUT) of
+            Q-values.
+        """
+        if version != self.version:
+            # Weights changed, so entries are stale.
+            self.clear()
+            self.version = version
+
+        values:list[np.ndarray] = [self.get(game_state.zobrist_key)
+                                   for game_state in game_states]
+        misses:list[int] = [i for i, value in enumerate(values)
+                            if value is None]
+        if misses:
+            missed_values:np.ndarray = evaluate(
+                [game_states[i] for i in misses])
+            for i, value in zip(misses, missed_values):
+                # Copy the row, so that entries do not keep the batch
+                # output alive.
+                values[i] = value.copy()
+                self.put(game_states[i].zobrist_key, values[i])
+
+        return np.stack(values)
+
+# END FILE ----------------------------------------------------------- #
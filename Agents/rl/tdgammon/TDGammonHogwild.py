@@ -0,0 +1,146 @@
+# INFORMATION -------------------------------------------------------- #
+
+# Author:  Josh Vaughan
+# Date:    18/10/2026
+# Purpose: Implements parallel TD-Gammon self-play training, where
+#          worker processes play games and apply lock-free TD(lambda)
+#          updates to weights in shared memory.
+
+# Reference List:
+#   Recht, B., Re, C., Wright, S., & Niu, F. (2011). Hogwild!: A
+#   lock-free approach to parallelizing stochastic gradient descent.
+#   Advances in Neural Information Processing Systems, 24.
+
+# IMPORTS ------------------------------------------------------------ #
+
+from datetime import datetime
+import queue
+import random
+import torch
+import torch.multiprocessing as mp
+
+from Agents.rl.tdgammon.TDGammon0_0 import myAgent as TDGAgent
+from BackgammonGame.backgammon_model import BLACK_ID, WHITE_ID, BackgammonRules
+from ExtendedFormGame.Game import Game
+
+# CONSTANTS ---------------------------------------------------------- #
+
+WORKER_JOIN_TIMEOUT:float = 1.0 # Seconds between draining the results.
+
+# FUNC DEF ----------------------------------------------------------- #
+
+def start_hogwild_workers(flat_params:torch.Tensor, agent_path:list[str],
+                          seed:int, num_workers:int) -> tuple[list, mp.Queue, mp.Event]:
+    """start_hogwild_workers
+    Starts worker processes playing self-play games between TD-Gammon
+    agents sharing a set of weights.
+
+    Args:
+        flat_params (torch.Tensor): Shared flat parameter buffer, from
+        TDGammonNN.share_params.
+        agent_path (list[str]): A list of agent paths, naming the
+        agents in each game.
+        seed (int): Integer for random seed, from which the seed of each
+        worker is derived.
+        num_workers (int): Number of worker processes.
+
+    Returns:
+        tuple[list, mp.Queue, mp.Event]: The worker processes, the
+        queue of completed episodes, and the event stopping the
+        workers.
+    """
+    random.seed(seed)
+    worker_seeds:list[float] = [random.random() for _ in range(num_workers)]
+
+    results:mp.Queue = mp.Queue()
+    stop:mp.Event = mp.Event()
+    workers:list = []
+    for worker_id in range(num_workers):
+        worker = mp.Process(target=hogwild_worker,
+                            args=(worker_id, flat_params, agent_path,
+                                  worker_seeds[worker_id], results, stop),
+                            daemon=True)
+        worker.start()
+        workers.append(worker)
+    return (workers, results, stop)
+
+def stop_hogwild_workers(workers:list, results:mp.Queue,
+                         stop:mp.Event) -> int:
+    """stop_hogwild_workers
+    Stops the worker processes once their current games end, discarding
+    the results of those games, whose updates are already applied to
+    the shared weights.
+
+    Args:
+        workers (list): The worker processes.
+        results (mp.Queue): Queue of completed episodes.
+        stop (mp.Event): Event stopping the workers.
+
+    Returns:
+        int: Number of episodes discarded.
+    """
+    stop.set()
+    num_discarded:int = 0
+    for worker in workers:
+        # Drain the results, so workers are not blocked on a full queue.
+        while worker.is_alive():
+            try:
+                results.get(timeout=WORKER_JOIN_TIMEOUT)
+                num_discarded += 1
+            except queue.Empty:
+                pass
+        worker.join()
+    # Collect the results queued as the last workers exited.
+    while True:
+        try:
+            results.get(timeout=WORKER_JOIN_TIMEOUT)
+            num_discarded += 1
+        except queue.Empty:
+            break
+    return num_discarded
+
+def hogwild_worker(worker_id:int, flat_params:torch.Tensor,
+                   agent_path:list[str], seed:float,
+                   results:mp.Queue, stop:mp.Event) -> None:
+    """hogwild_worker
+    Plays self-play games until stopped, between TD-Gammon agents whose
+    weights are views into the shared parameters, and whose eligibility
+    traces belong to the worker. Each game is reported as a tuple of the
+    worker ID, the game seed, the game history, and the elapsed episode
+    time.
+
+    Args:
+        worker_id (int): ID of the worker.
+        flat_params (torch.Tensor): Shared flat parameter buffer.
+        agent_path (list[str]): A list of agent paths, naming the
+        agents in each game.
+        seed (float): Random seed of the worker.
+        results (mp.Queue): Queue of completed episodes.
+        stop (mp.Event): Event stopping the worker.
+    """
+    # Parallelism comes from the workers, so each uses a single thread.
+    torch.set_num_threads(1)
+    random.seed(seed)
+
+    # Both agents reference the same Q-Function, using the shared
+    # weights.
+    agent_list:list[TDGAgent] = [TDGAgent(BLACK_ID), TDGAgent(WHITE_ID)]
+    qfunction = agent_list[BLACK_ID].qfunction
+    qfunction.nn.share_params(flat_params)
+    for agent in agent_list:
+        agent.qfunction = qfunction
+        agent.mdp.qfunction = qfunction
+
+    while not stop.is_set():
+        start:datetime = datetime.now()
+
+        # Create game.
+        tmp_seed:float = random.random()
+        bg_game = Game(BackgammonRules(), agent_list, agent_path,
+                       len(agent_list), tmp_seed)
+
+        # Run game.
+        history:dict = bg_game.run()
+        results.put((worker_id, tmp_seed, history, datetime.now() - start))
+
+# END FILE ----------------------------------------------------------- #
@@ -0,0 +1,159 @@
+# INFORMATION -------------------------------------------------------- #
+
+# Author:  Josh Vaughan
+# Date:    18/10/2026
+# Purpose: Implements a runner that plays games in lockstep, so that
+#          the afterstates of every game are evaluated by a TD-Gammon
+#          Q-function in a single batch.
+
+# IMPORTS ------------------------------------------------------------ #
+
+from datetime import datetime, timedelta
+from typing import Iterator
+import random
+import numpy as np
+
+from Agents.rl.template.qfunction import QFunction
+from Agents.rl.tdgammon.TDGammonMDP import select_greedy_index
+from BackgammonGame.backgammon_model import BackgammonRules, BackgammonState
+from BackgammonGame.playout import Policy, play_turn
+from ExtendedFormGame.Game import WARNING_LIMIT
+
+# CONSTANTS ---------------------------------------------------------- #
+
+LOCKSTEP_GAMES:int = 64 # Number of games played in lockstep.
+
+# FUNC DEF ----------------------------------------------------------- #
+
+def run_lockstep_games(game_rules:BackgammonRules,
+                       qfunctions:list[QFunction],
+                       policies:list[Policy], seeds:list[float],
+                       agent_names:list[str],
+                       num_lockstep:int = LOCKSTEP_GAMES) -> Iterator[tuple[int, dict, timedelta]]:
+    """run_lockstep_games
+    Plays games between agents, advancing up to num_lockstep games by a
+    turn at each step, and starting a new game whenever one finishes.
+    Agents with a Q-function select the afterstate with the highest
+    estimated value, as the inference agent does, with the afterstates
+    of every game sharing a Q-function evaluated in one batch. Other
+    agents select actions with their policy.
+
+    Each game draws from its own random state, seeded from its seed as
+    ExtendedFormGame.Game seeds a game, so that a game does not depend
+    on the games played alongside it, and plays as the Game harness
+    would without time limits.
+
+    Args:
+        game_rules (BackgammonRules): Rules of the game.
+        qfunctions (list[QFunction]): Q-function of each agent, indexed
+        by Agent ID, or None for agents using a policy.
+        policies (list[Policy]): Policy of each agent without a
+        Q-function, indexed by Agent ID.
+        seeds (list[float]): Random seed of each game, in the order the
+        games are started.
+        agent_names (list[str]): Name of each agent, indexed by Agent
+        ID.
+        num_lockstep (int, optional): Number of games played in
+        lockstep. Defaults to LOCKSTEP_GAMES.
+
+    Yields:
+        tuple[int, dict, timedelta]: Index of each game, in the order
+        the games are started, its history as in the history of ExtendedFormGame.Game, and the
+        elapsed time from its start to its end.
+    """
+    # Games are lists of the game state, history, index, start time, and
+    # random state.
+    games:list[list] = []
+    num_started:int = 0
+    # Finished games waiting for the games started before them.
+    finished:dict[int, tuple] = dict()
+    num_yielded:int = 0
+    while games or num_started < len(seeds):
+        # Start new games in place of the finished games.
+        while len(games) < num_lockstep and num_started < len(seeds):
+            # Seed before the opening roll, and again once the game is
+            # set up, as the runner and Game do.
+            random.seed(seeds[num_started])
+            game_state:BackgammonState = game_rules.initial_game_state()
+            random.seed(seeds[num_started])
+            games.append([game_state, {"actions":[]}, num_started,
+                          datetime.now(), random.getstate()])
+            num_started += 1
+
+        # Play the turn of agents with policies, and group the games by
+        # the Q-function of the agent to move.
+        batches:dict[int, list[list]] = dict()
+        for game in games:
+            agent_id:int = game[0].current_agent_id
+            if qfunctions[agent_id] is None:
+                random.setstate(game[4])
+                play_lockstep_turn(game_rules, game,
+                                   policies[agent_id](game[0], agent_id))
+                game[4] = random.getstate()
+            else:
+                batches.setdefault(id(qfunctions[agent_id]), []).append(game)
+
+        # Evaluate the afterstates of each group in a single batch.
+        for batch in batches.values():
+            agent_id:int = batch[0][0].current_agent_id
+            candidates:list[list[tuple]] = [
+                game_rules.get_legal_afterstates(game[0],
+                                                 game[0].current_agent_id,
+                                                 unique_positions=True)
+                for game in batch]
+            values:np.ndarray = qfunctions[agent_id].get_q_values(
+                [afterstate for pairs in candidates
+                 for _, afterstate in pairs])
+
+            # Play the highest estimated outcome state value.
+            offset:int = 0
+            for game, pairs in zip(batch, candidates):
+                random.setstate(game[4])
+                play_lockstep_turn(game_rules, game, pairs[select_greedy_index(
+                    values[offset:offset + len(pairs),
+                           game[0].current_agent_id])][0])
+                game[4] = random.getstate()
+                offset += len(pairs)
+
+        # Collect the finished games.
+        active_games:list[list] = []
+        for game in games:
+            if game_rules.game_ends(game[0]):
+                # Include game setup details, as Game does.
+                game[1].update({"seed":seeds[game[2]],
+                                "num_of_agent":game_rules.num_agents,
+                                "agents_namelist":agent_names,
+                                "warning_positions":[],
+                                "warning_limit":WARNING_LIMIT})
+                game[1]["scores"] = [
+                    game_rules.calculate_endgame_score(game[0], j)
+                    for j in range(game_rules.num_agents)]
+                finished[game[2]] = (game[2], game[1],
+                                     datetime.now() - game[3])
+            else:
+                active_games.append(game)
+        games = active_games
+
+        # Report the finished games in the order they were started.
+        while num_yielded in finished:
+            yield finished.pop(num_yielded)
+            num_yielded += 1
+
+def play_lockstep_turn(game_rules:BackgammonRules, game:list,
+                       action:tuple) -> None:
+    """play_lockstep_turn
+    Records the action of the agent to move in the history of a game
+    played in lockstep, and plays it.
+
+    Args:
+        game_rules (BackgammonRules): Rules of the game.
+        game (list): Game, as in run_lockstep_games.
+        action (tuple): Action of the agent to move.
+    """
+    history:dict = game[1]
+    history["actions"].append({"turn":len(history["actions"]),
+                               "agent_id":game[0].current_agent_id,
+                               "action":action})
+    play_turn(game_rules, game[0], action)
+
+# END FILE ----------------------------------------------------------- #
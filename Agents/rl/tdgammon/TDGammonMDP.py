@@ -11,6 +11,9 @@
 
 # IMPORTS ------------------------------------------------------------ #
 
+import random
+import numpy as np
+
 from Agents.rl.template.mdp import MDP
 from Agents.rl.template.qfunction import QFunction
 from BackgammonGame.backgammon_model import BackgammonRules, BackgammonState
@@ -18,6 +21,10 @@ from BackgammonGame.backgammon_model import BackgammonRules, BackgammonState
 # CONSTANTS ---------------------------------------------------------- #
 
 TD_GAMMA:float = 1.0 # As defined in Tesauro paper.
+# Values within this many float32 ulps of the best value are ties, so
+# that the rounding differences between the PyTorch and NumPy backends
+# do not change the set of best afterstates of saturated values.
+GREEDY_TIE_ULPS:int = 4
 
 # CLASS DEF ---------------------------------------------------------- #      
 
@@ -47,4 +54,29 @@ class TDGammonMDP(MDP):
         """       
         return float(self.game_rules.calculate_endgame_score(game_state_p, agent_id))
 
+# FUNC DEF ----------------------------------------------------------- #
+
+def select_greedy_index(values:np.ndarray,
+                        tie_ulps:int = GREEDY_TIE_ULPS) -> int:
+    """select_greedy_index
+    Returns the index of the highest estimated afterstate value, breaking
+    ties within tie_ulps float32 ulps of the best value at random.
+    Genuine near-ties of more than a few ulps are not ties, so the
+    backends may still select differently between them.
+
+    Args:
+        values (np.ndarray): Estimated value of each afterstate for the
+        agent.
+        tie_ulps (int, optional): Number of float32 ulps of the best
+        value within which values are ties, where 0 breaks only exact
+        ties. Defaults to GREEDY_TIE_ULPS.
+
+    Returns:
+        int: Index of the selected afterstate.
+    """
+    max_value:np.float32 = np.float32(values.max())
+    max_indices:np.ndarray = np.flatnonzero(
+        values >= max_value - tie_ulps * np.spacing(max_value))
+    return random.choice(max_indices)
+
 # END FILE ----------------------------------------------------------- #
\ No newline at end of file
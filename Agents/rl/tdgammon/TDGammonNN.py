@@ -17,7 +17,9 @@ import torch
 import torch.nn as nn
 
 from Agents.rl.template.qfunction import QFunction
-from BackgammonGame.backgammon_model import BackgammonRules, BackgammonState, generate_td_gammon_vector
+from Agents.rl.tdgammon.TDGammonCache import EvaluationCache
+from Agents.rl.tdgammon.TDGammonNumpy import NUMPY_POLICY_KEYS, set_endgame_values
+from BackgammonGame.backgammon_model import AGENT_INDEX, POSITION_ID_SIZE, WINNING_SCORE, BackgammonRules, BackgammonState, generate_td_gammon_vector, generate_td_gammon_matrix, decode_position_ids, encode_td_gammon_boards
 
 # CONSTANTS ---------------------------------------------------------- #
 
@@ -34,11 +36,16 @@ class TDGammonNNQFunction(QFunction):
     def __init__(self,
                  hidden_features:int = NUM_TDGAMMON1_HIDDEN,
                  alpha:float = TD_ALPHA,
-                 lamda:float = TD_LAMDA) -> None:
+                 lamda:float = TD_LAMDA,
+                 cache_capacity:int = 0) -> None:
         
         super().__init__(alpha)
         self.nn:TDGammonNN = TDGammonNN(hidden_features, lamda)
         self.gr:BackgammonRules = BackgammonRules()
+
+        # Cache evaluations of positions, if a capacity is provided.
+        self.cache:EvaluationCache = (EvaluationCache(cache_capacity)
+                                      if cache_capacity > 0 else None)
         
     def get_q_value(self, game_state:BackgammonState,
                     action:tuple) -> torch.Tensor:
@@ -58,16 +65,72 @@ class TDGammonNNQFunction(QFunction):
             output = np.zeros(self.gr.num_agents)
             for i in range(self.gr.num_agents):
                 output[i] = self.gr.calculate_endgame_score(game_state, i)
+        elif self.cache is not None:
+            output = self.get_q_values([game_state])[0]
         else:
             game_vector:np.array = generate_td_gammon_vector(game_state)
             output = self.nn.forward(game_vector).detach().numpy()
         return output
 
+    def get_q_values(self, game_states:list[BackgammonState],
+                     return_hidden:bool = False) -> np.ndarray:
+        """ get_q_values
+        Return Q-values for a list of states, using a single forward
+        pass over the stacked TD-gammon vectors of the states missing
+        from the cache.
+
+        Args:
+            game_states (list[GameState]): States s.
+            return_hidden (bool, optional): Whether to also return the
+            hidden layer activations, bypassing the cache. Defaults to
+            False.
+
+        Returns:
+            np.ndarray: Array of shape (N, NUM_TDGAMMON_OUTPUT) of
+            Q-values, and if return_hidden, an array of shape
+            (N, hidden_features) of hidden layer activations.
+        """
+        if self.cache is not None and not return_hidden:
+            return self.cache.get_q_values(game_states, self.nn.version,
+                                           self._evaluate)
+        return self._evaluate(game_states, return_hidden)
+
+    def _evaluate(self, game_states:list[BackgammonState],
+                  return_hidden:bool = False) -> np.ndarray:
+        """ _evaluate
+        Return Q-values for a list of states, using a single forward
+        pass over the stacked TD-gammon vectors.
+
+        Args:
+            game_states (list[GameState]): States s.
+            return_hidden (bool, optional): Whether to also return the
+            hidden layer activations. Defaults to False.
+
+        Returns:
+            np.ndarray: Array of shape (N, NUM_TDGAMMON_OUTPUT) of
+            Q-values, and if return_hidden, an array of shape
+            (N, hidden_features) of hidden layer activations.
+        """
+        with torch.inference_mode():
+            hidden, output = self.nn.forward_hidden(
+                generate_td_gammon_matrix(game_states))
+        output:np.ndarray = set_endgame_values(self.gr, game_states,
+                                               output.numpy())
+
+        if return_hidden:
+            return output, hidden.numpy()
+        return output
+
     def update(self, game_state:BackgammonState, game_state_p:BackgammonState,
                actions_p:list[tuple], reward:float, gamma:float,
-               agent_id:int) -> None:
+               agent_id:int, val_p:np.ndarray = None,
+               val:np.ndarray = None, hidden:np.ndarray = None) -> None:
         """update
         Updates the Q-value at a particular moment in the game.
+
+        Values and activations already computed during action selection
+        can be passed in, so that the update only costs the gradient of
+        the output and the in-place trace and weight updates.
     
         Args:
             game_state (GameState): State s
@@ -76,35 +139,117 @@ class TDGammonNNQFunction(QFunction):
             reward (list[float]): List for the reward for each agent.
             gamma (float): Float for the gamma
             agent_id (int): Integer representing agent id.
+            val_p (np.ndarray, optional): Q-values of state s', when
+            already evaluated. Defaults to None.
+            val (np.ndarray, optional): Q-values of state s, when
+            already evaluated. Defaults to None.
+            hidden (np.ndarray, optional): Hidden layer activations of
+            state s, when already evaluated. Defaults to None.
         """
+        # Determine the value of s, and its activations.
+        gs_vec:np.ndarray = generate_td_gammon_vector(game_state)
+        if val is None or hidden is None:
+            with torch.inference_mode():
+                hidden_t, val_t = self.nn.forward_hidden(gs_vec)
+            val, hidden = val_t.numpy(), hidden_t.numpy()
+
         # Determine the delta.
-        val = self.get_q_value(game_state, None)
-        val_p = self.get_q_value(game_state_p, None)
-        delta:float = (reward
-                       + (gamma * val_p[agent_id])
-                       - val[agent_id])
+        if val_p is None:
+            val_p = self.get_q_value(game_state_p, None)
+        delta:float = float(reward
+                            + (gamma * val_p[agent_id])
+                            - val[agent_id])
         
         # Update the weights.
-        gs_vec = generate_td_gammon_vector(game_state)
-        val_t = self.nn.forward(gs_vec)
-        val_p_t = torch.Tensor(val_p)
-        #val_p_t.requires_grad = True
-        self.nn.update_weights(val_t, val_p_t,
+        self.nn.update_weights(gs_vec, hidden, val, agent_id,
                                self.alpha, gamma, delta)
 
+    def update_trajectories(self, trajectories:list[list[bytes]],
+                            scores:list[list[float]],
+                            gamma:float) -> None:
+        """update_trajectories
+        Updates the weights with offline TD(lambda) over complete games,
+        given as the position IDs at the start of the game and after
+        each turn. Every position is evaluated in a single forward pass
+        with the current weights, and the eligibility traces of each
+        game are folded into the TD errors, accumulated backwards from
+        the end of the game, so the update is a single batched gradient
+        step. Rewards and deltas match update, but traces start from
+        zero in each game.
+
+        Args:
+            trajectories (list[list[bytes]]): Position IDs of each game.
+            scores (list[list[float]]): Final scores of each game, all
+            LOSING_SCORE for a game that did not end.
+            gamma (float): Float for the gamma
+        """
+        position_ids:np.ndarray = np.frombuffer(
+            b"".join(b"".join(trajectory) for trajectory in trajectories),
+            dtype=np.uint8).reshape(-1, POSITION_ID_SIZE)
+        boards:np.ndarray = decode_position_ids(position_ids)
+        x:np.ndarray = encode_td_gammon_boards(boards)
+        agent_ids:np.ndarray = boards[:, AGENT_INDEX].astype(np.int64)
+        with torch.inference_mode():
+            hidden_t, output_t = self.nn.forward_hidden(x)
+        hidden, output = hidden_t.numpy(), output_t.numpy()
+
+        # Accumulate the TD errors of each game backwards, as
+        # e_t = delta_t + (gamma * lamda * e_t+1).
+        errors:np.ndarray = np.zeros(len(x), dtype=np.float32)
+        decay:float = gamma * self.nn.lamda
+        start:int = 0
+        for trajectory, score in zip(trajectories, scores):
+            end:int = start + len(trajectory) - 1
+            game_ends:bool = WINNING_SCORE in score
+            # NOTE: The final position uses the exact result of the game
+            # when it ends, not the estimated value.
+            next_value:np.ndarray = (np.asarray(score, dtype=np.float32)
+                                     if game_ends else output[end])
+            error:float = 0.0
+            for t in range(end - 1, start - 1, -1):
+                agent_id:int = agent_ids[t]
+                reward:float = score[agent_id] if t == end - 1 else 0.0
+                delta:float = (reward + (gamma * next_value[agent_id])
+                               - output[t, agent_id])
+                error = delta + (decay * error)
+                errors[t] = error
+                next_value = output[t]
+            start = end + 1
+
+        # Update the weights.
+        self.nn.update_weights_batch(x, hidden, output, agent_ids,
+                                     self.alpha, errors)
 
-    def save_policy(self, filepath:PureWindowsPath) -> None:
+    def save_policy(self, filepath:PureWindowsPath,
+                    save_traces:bool = True) -> None:
         """Saves a policy to a specific filename.
     
         Args:
             filepath (PureWindowsPath): String describing filepath and filename
             to save Q-function to.
+            save_traces (bool, optional): Whether to save the eligibility
+            traces, which are omitted when they are not those of the
+            training. Defaults to True.
         """
         filepath_str:str = str(PurePosixPath(filepath))
-        torch.save({"model_state_dict":self.nn.state_dict(),
-                    "eligbility": self.nn.eligibility_traces if self.nn.eligibility_traces else []},
-                    f=filepath_str)
+        checkpoint:dict = {"model_state_dict":self.nn.state_dict()}
+        if save_traces:
+            checkpoint["eligbility"] = [trace.clone() for trace in self.nn.eligibility_traces]
+        torch.save(checkpoint, f=filepath_str)
     
+    def export_policy(self, filepath:PureWindowsPath) -> None:
+        """Exports the weights of the policy to a NumPy .npz file, for
+        the TDGammonNumpyQFunction inference backend.
+
+        Args:
+            filepath (PureWindowsPath): String describing filepath and filename
+            to export Q-function to.
+        """
+        filepath_str:str = str(PurePosixPath(filepath))
+        np.savez(filepath_str, **{key: param.detach().numpy()
+                                  for key, param in zip(NUMPY_POLICY_KEYS,
+                                                        self.nn.parameters())})
+
     def load_policy(self, filepath:PureWindowsPath) -> None:
         """Load a policy from a specific filename.
 
@@ -115,7 +260,15 @@ class TDGammonNNQFunction(QFunction):
         filepath_str:str = str(PurePosixPath(filepath))
         checkpoint = torch.load(filepath_str)
         self.nn.load_state_dict(checkpoint["model_state_dict"])
-        self.nn.eligibility_traces = checkpoint["eligbility"]
+        self.nn.version += 1
+        # Copy into the existing traces, which are views of a flat
+        # buffer, or reset them when they were not saved.
+        if "eligbility" not in checkpoint:
+            self.nn.flat_traces.zero_()
+            return
+        for trace, saved_trace in zip(self.nn.eligibility_traces,
+                                      checkpoint["eligbility"]):
+            trace.copy_(saved_trace)
 
 class TDGammonNN(nn.Module):
     """TDGammonNN
@@ -150,12 +303,58 @@ class TDGammonNN(nn.Module):
         for p in self.parameters():
             nn.init.zeros_(p)
 
-        # Initialise eligbility traces.
+        # Version of the weights, incremented whenever they change so
+        # that cached evaluations can be invalidated.
+        self.version:int = 0
+
+        # Store the parameters, eligbility traces, and gradients in
+        # flat preallocated buffers, with each parameter, trace, and
+        # gradient being a view into its buffer, so that the TD(lambda)
+        # update runs in place over whole buffers.
         self.lamda:float = lamda
-        self.eligibility_traces:list = [torch.zeros(weights.shape, requires_grad=False) for weights in list(self.parameters())]
+        num_params:int = sum(p.numel() for p in self.parameters())
+        self.flat_params:torch.Tensor = torch.zeros(num_params)
+        self.flat_traces:torch.Tensor = torch.zeros(num_params)
+        self.flat_gradients:torch.Tensor = torch.zeros(num_params)
+        self.eligibility_traces:list = []
+        self.gradients:list = []
+        offset:int = 0
+        for p in self.parameters():
+            flat_slice:slice = slice(offset, offset + p.numel())
+            self.flat_params[flat_slice].copy_(p.detach().view(-1))
+            p.data = self.flat_params[flat_slice].view_as(p)
+            self.eligibility_traces.append(
+                self.flat_traces[flat_slice].view_as(p))
+            self.gradients.append(self.flat_gradients[flat_slice].view_as(p))
+            offset += p.numel()
+
+    def share_params(self, flat_params:torch.Tensor = None) -> torch.Tensor:
+        """share_params
+        Places the parameters in shared memory, so that processes can
+        apply lock-free (Hogwild) TD(lambda) updates to the same
+        weights, each with its own eligibility traces and gradients.
+        When the shared parameters of another network are provided,
+        the parameters of this network become views into them instead.
+
+        Args:
+            flat_params (torch.Tensor, optional): Shared parameters of
+            a network of the same size. Defaults to None, moving the
+            parameters of this network to shared memory.
 
-        # Define loss function.
-        self.loss = nn.MSELoss()
+        Returns:
+            torch.Tensor: Shared flat parameter buffer.
+        """
+        if flat_params is None:
+            self.flat_params.share_memory_()
+            return self.flat_params
+
+        assert(flat_params.shape == self.flat_params.shape)
+        self.flat_params = flat_params
+        offset:int = 0
+        for p in self.parameters():
+            p.data = self.flat_params[offset:offset + p.numel()].view_as(p)
+            offset += p.numel()
+        return self.flat_params
 
     # NOTE: Overriding method.
     def forward(self, x):
@@ -170,51 +369,115 @@ class TDGammonNN(nn.Module):
         x = self.output(x)
         return x
     
-    def update_weights(self, prediction:torch.Tensor,
-                       target:torch.Tensor,
+    def forward_hidden(self, x) -> tuple[torch.Tensor, torch.Tensor]:
+        """forward_hidden
+        Model inference, also returning the hidden layer activations.
+
+        Args:
+            x (np.ndarray): A vector, or matrix of stacked vectors.
+
+        Returns:
+            tuple[torch.Tensor, torch.Tensor]: Hidden layer activations
+            and output.
+        """
+        hidden = self.hidden(torch.from_numpy(np.array(x)))
+        return hidden, self.output(hidden)
+    
+    def update_weights(self, x:np.ndarray,
+                       hidden:np.ndarray,
+                       output:np.ndarray,
+                       agent_id:int,
                        alpha:float,
                        gamma:float,
                        delta:float) -> None:
         """update_weights
-        Update the weights of the model.
+        Update the weights of the model using TD(lambda), with the
+        gradient of the agent's output computed directly from the
+        activations of the model on state s.
 
         Args:
-            output (torch.Tensor): Output from training inference.
+            x (np.ndarray): TD-gammon vector of state s.
+            hidden (np.ndarray): Hidden layer activations on state s.
+            output (np.ndarray): Output on state s.
+            agent_id (int): Output to take the gradient of.
             alpha (float): Alpha value.
             gamma (float): Gamma value.
             delta (float): Delta value.
         """
-        # Reset gradients.
-        self.zero_grad()
+        with torch.no_grad():
+            x_t:torch.Tensor = torch.tensor(x, dtype=torch.float32)
+            hidden_t:torch.Tensor = torch.tensor(hidden, dtype=torch.float32)
+            hidden_weight_grad, hidden_bias_grad, output_weight_grad, output_bias_grad = self.gradients
+
+            # Compute the gradient of the agent's output w.r.t. the
+            # parameters, using sigmoid'(z) = sigmoid(z)(1 - sigmoid(z)).
+            output_delta:float = float(output[agent_id] * (1 - output[agent_id]))
+            output_weight_grad.zero_()
+            output_bias_grad.zero_()
+            torch.mul(hidden_t, output_delta, out=output_weight_grad[agent_id])
+            output_bias_grad[agent_id] = output_delta
+            torch.mul(self.output[0].weight[agent_id], output_delta,
+                      out=hidden_bias_grad)
+            hidden_bias_grad.mul_(hidden_t).mul_(1 - hidden_t)
+            torch.outer(hidden_bias_grad, x_t, out=hidden_weight_grad)
+
+            # Compute eligbility traces:
+            # e_t = (gamma * lamda * e_t-1) + (gradient of output w.r.t. weights)
+            self.flat_traces.mul_(gamma * self.lamda).add_(self.flat_gradients)
+
+            # Parameter Update:
+            # theta <- theta + (alpha * delta * e_t)
+            self.flat_params.add_(self.flat_traces, alpha=alpha * delta)
+        self.version += 1
 
-        # Compute the derivative of the output w.r.t. the parameters.
-        output = self.loss(prediction, target)
-        output.backward()
+    def update_weights_batch(self, x:np.ndarray,
+                             hidden:np.ndarray,
+                             output:np.ndarray,
+                             agent_ids:np.ndarray,
+                             alpha:float,
+                             errors:np.ndarray) -> None:
+        """update_weights_batch
+        Update the weights of the model by the sum over a batch of
+        states of the gradient of each agent's output scaled by its TD
+        error, with the gradients computed directly from the
+        activations of the model on the batch.
 
+        Args:
+            x (np.ndarray): TD-gammon matrix of the states.
+            hidden (np.ndarray): Hidden layer activations on the states.
+            output (np.ndarray): Outputs on the states.
+            agent_ids (np.ndarray): Output to take the gradient of, for
+            each state.
+            alpha (float): Alpha value.
+            errors (np.ndarray): TD error of each state.
+        """
         with torch.no_grad():
-            i:int = 0
-            for param in self.parameters():
-                # Compute eligbility traces:
-                # e_t = (gamma * delta e_t-1) + (gradient of weights w.r.t. output)
-                # NOTE: I HAVE NOT BEEN ABLE TO UPDATE THE ETRACES AND
-                # IN TURN THE WEIGHTS, BECAUSE THERE IS NEVER A GRADIENT
-                # ON THE WEIGHTS. THE V_T+1 IS ALWAYS EQUAL TO V_T
-                # BECAUSE THEY ARE BOTH FROM THE SAME MODEL, WITH NOW
-                # EXTERNAL IMPACT ON WHETHER TO UPDATE THE VALUE FUNCTION.
-                # THEREFORE, WE NEED TO ENFORCE THAT WHEN WE SEE AN END
-                # STATE, WE DO NOT USE THE VALUE FUNCTION, AND PROVIDE
-                # THE RELEVANT VALUE INTO THE TENSOR.
-                self.eligibility_traces[i] = ((gamma * self.lamda * self.eligibility_traces[i])
-                                              + param.grad)
-
-                # Parameter Update:
-                # theta <- theta + (alpha * delta * gradient of Q-function)
-                # NOTE: .copy_ method allows for the inplace update of
-                # the parameters, instead of previous approaches, which
-                # were unable to do this.
-                param.copy_(param +
-                            (alpha * delta * self.eligibility_traces[i]))
-                i+=1
+            x_t:torch.Tensor = torch.as_tensor(x, dtype=torch.float32)
+            hidden_t:torch.Tensor = torch.as_tensor(hidden, dtype=torch.float32)
+            hidden_weight_grad, hidden_bias_grad, output_weight_grad, output_bias_grad = self.gradients
+
+            # Scale the gradient of each agent's output by its error,
+            # using sigmoid'(z) = sigmoid(z)(1 - sigmoid(z)).
+            rows:np.ndarray = np.arange(len(x))
+            agent_output:np.ndarray = output[rows, agent_ids]
+            output_deltas:np.ndarray = np.zeros_like(output, dtype=np.float32)
+            output_deltas[rows, agent_ids] = (errors * agent_output
+                                              * (1 - agent_output))
+            output_deltas_t:torch.Tensor = torch.from_numpy(output_deltas)
+
+            # Sum the gradients over the batch.
+            torch.matmul(output_deltas_t.T, hidden_t, out=output_weight_grad)
+            torch.sum(output_deltas_t, dim=0, out=output_bias_grad)
+            hidden_deltas:torch.Tensor = torch.matmul(output_deltas_t,
+                                                      self.output[0].weight)
+            hidden_deltas.mul_(hidden_t).mul_(1 - hidden_t)
+            torch.sum(hidden_deltas, dim=0, out=hidden_bias_grad)
+            torch.matmul(hidden_deltas.T, x_t, out=hidden_weight_grad)
+
+            # Parameter Update:
+            # theta <- theta + (alpha * sum of error * gradient)
+            self.flat_params.add_(self.flat_gradients, alpha=alpha)
+        self.version += 1
 
 
 # END FILE ----------------------------------------------------------- #
\ No newline at end of file
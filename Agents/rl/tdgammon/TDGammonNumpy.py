@@ -0,0 +1,224 @@
+# INFORMATION -------------------------------------------------------- #
+
+# Author:  Josh Vaughan
+# Date:    17/10/2026
+# Purpose: Implements a NumPy inference backend for the TD-Gammon
+#          network, so that evaluation does not require PyTorch.
+
+# Reference List:
+#   Tesauro, G. (1995). Temporal difference learning and TD-Gammon.
+#   Communications of the ACM, 38(3), 58-68.
+
+# IMPORTS ------------------------------------------------------------ #
+
+from pathlib import PurePosixPath, PureWindowsPath
+import numpy as np
+
+from Agents.rl.template.qfunction import QFunction
+from Agents.rl.tdgammon.TDGammonCache import EvaluationCache
+from BackgammonGame.backgammon_model import BackgammonRules, BackgammonState, generate_td_gammon_vector, generate_td_gammon_matrix
+
+# CONSTANTS ---------------------------------------------------------- #
+
+NUMPY_POLICY_FILETYPE:str = ".npz"
+# Keys of the exported weights, in the order of TDGammonNN.parameters().
+NUMPY_POLICY_KEYS:tuple = ("hidden_weight", "hidden_bias",
+                           "output_weight", "output_bias")
+
+# CLASS DEF ---------------------------------------------------------- #
+
+class TDGammonNumpyQFunction(QFunction):
+
+    def __init__(self, cache_capacity:int = 0) -> None:
+        """__init__
+        Initialise an inference-only Q-function evaluating the TD-Gammon
+        network with NumPy, using weights exported from a trained
+        TDGammonNNQFunction.
+
+        Args:
+            cache_capacity (int, optional): Number of position
+            evaluations to cache. Defaults to 0, disabling the cache.
+        """
+        super().__init__()
+        self.gr:BackgammonRules = BackgammonRules()
+        self.cache:EvaluationCache = (EvaluationCache(cache_capacity)
+                                      if cache_capacity > 0 else None)
+        self.version:int = 0
+        self.hidden_weight_t:np.ndarray = None
+        self.hidden_bias:np.ndarray = None
+        self.output_weight_t:np.ndarray = None
+        self.output_bias:np.ndarray = None
+
+    def forward(self, x:np.ndarray) -> np.ndarray:
+        """forward
+        Model inference, as a matmul and sigmoid for each layer.
+
+        Args:
+            x (np.ndarray): A vector, or matrix of stacked vectors.
+
+        Returns:
+            np.ndarray: Output of the model.
+        """
+        hidden:np.ndarray = np.matmul(x, self.hidden_weight_t)
+        hidden += self.hidden_bias
+        output:np.ndarray = np.matmul(sigmoid(hidden), self.output_weight_t)
+        output += self.output_bias
+        return sigmoid(output)
+
+    def get_q_value(self, game_state:BackgammonState,
+                    action:tuple) -> np.ndarray:
+        """ get_q_value
+        Return Q-value for action,game_state pair.
+
+        Args:
+            game_state (GameState): State s
+            action (Action): Action a
+
+        Returns:
+            np.ndarray: Q-value for each agent.
+        """
+        if self.gr.game_ends(game_state):
+            # NOTE: Game ends so we need to use exact result from
+            # winning the game not the estimated value.
+            output = np.zeros(self.gr.num_agents)
+            for i in range(self.gr.num_agents):
+                output[i] = self.gr.calculate_endgame_score(game_state, i)
+        elif self.cache is not None:
+            output = self.get_q_values([game_state])[0]
+        else:
+            output = self.forward(generate_td_gammon_vector(game_state))
+        return output
+
+    def get_q_values(self, game_states:list[BackgammonState]) -> np.ndarray:
+        """ get_q_values
+        Return Q-values for a list of states, using a single forward
+        pass over the stacked TD-gammon vectors of the states missing
+        from the cache.
+
+        Args:
+            game_states (list[GameState]): States s.
+
+        Returns:
+            np.ndarray: Array of shape (N, NUM_TDGAMMON_OUTPUT) of
+            Q-values.
+        """
+        if self.cache is not None:
+            return self.cache.get_q_values(game_states, self.version,
+                                           self._evaluate)
+        return self._evaluate(game_states)
+
+    def _evaluate(self, game_states:list[BackgammonState]) -> np.ndarray:
+        """ _evaluate
+        Return Q-values for a list of states, using a single forward
+        pass over the stacked TD-gammon vectors.
+
+        Args:
+            game_states (list[GameState]): States s.
+
+        Returns:
+            np.ndarray: Array of shape (N, NUM_TDGAMMON_OUTPUT) of
+            Q-values.
+        """
+        output:np.ndarray = self.forward(generate_td_gammon_matrix(game_states))
+        return set_endgame_values(self.gr, game_states, output)
+
+    def load_policy(self, filepath:PureWindowsPath) -> None:
+        """Load a policy exported by TDGammonNNQFunction.export_policy.
+
+        Args:
+            filepath (PureWindowsPath): String describing filepath and filename
+            to load Q-function from.
+        """
+        filepath_str:str = str(PurePosixPath(filepath))
+        with np.load(filepath_str) as weights:
+            # Store the weights transposed, so inputs multiply on the
+            # left as rows.
+            self.hidden_weight_t = np.ascontiguousarray(
+                weights["hidden_weight"].T, dtype=np.float32)
+            self.hidden_bias = weights["hidden_bias"].astype(np.float32)
+            self.output_weight_t = np.ascontiguousarray(
+                weights["output_weight"].T, dtype=np.float32)
+            self.output_bias = weights["output_bias"].astype(np.float32)
+        self.version += 1
+
+# FUNC DEF ----------------------------------------------------------- #
+
+def sigmoid(x:np.ndarray) -> np.ndarray:
+    """sigmoid
+    Applies the logistic sigmoid to x in place.
+
+    Args:
+        x (np.ndarray): Array of pre-activations.
+
+    Returns:
+        np.ndarray: x, holding the activations.
+    """
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1
+    return np.reciprocal(x, out=x)
+
+def set_endgame_values(game_rules:BackgammonRules,
+                       game_states:list[BackgammonState],
+                       output:np.ndarray) -> np.ndarray:
+    """set_endgame_values
+    Replaces the estimated Q-values of states where the game ends with
+    the exact result of the game.
+
+    Args:
+        game_rules (BackgammonRules): Rules of the game.
+        game_states (list[GameState]): States s.
+        output (np.ndarray): Array of shape (N, NUM_TDGAMMON_OUTPUT) of
+        Q-values, updated in place.
+
+    Returns:
+        np.ndarray: Updated Q-values.
+    """
+    for i, game_state in enumerate(game_states):
+        if game_rules.game_ends(game_state):
+            for j in range(game_rules.num_agents):
+                output[i, j] = game_rules.calculate_endgame_score(game_state, j)
+    return output
+
+def get_numpy_policy_path(filepath:str) -> str:
+    """get_numpy_policy_path
+    Returns the path of the policy exported by
+    TDGammonNNQFunction.export_policy for a policy file, alongside it.
+
+    Args:
+        filepath (str): Path to a .pt checkpoint or .npz export.
+
+    Returns:
+        str: Path to the .npz export.
+    """
+    return str(PurePosixPath(filepath).with_suffix(NUMPY_POLICY_FILETYPE))
+
+def load_numpy_qfunction(filepath:str,
+                         cache_capacity:int = 0) -> TDGammonNumpyQFunction:
+    """load_numpy_qfunction
+    Returns a TDGammonNumpyQFunction for a policy file. A PyTorch
+    checkpoint is first exported alongside itself, which requires
+    PyTorch, while an exported policy is loaded without it.
+
+    Args:
+        filepath (str): Path to a .pt checkpoint or .npz export.
+        cache_capacity (int, optional): Number of position evaluations
+        to cache. Defaults to 0, disabling the cache.
+
+    Returns:
+        TDGammonNumpyQFunction: Loaded Q-function.
+    """
+    numpy_filepath:str = get_numpy_policy_path(filepath)
+    if PurePosixPath(filepath).suffix != NUMPY_POLICY_FILETYPE:
+        # NOTE: Imported here so that loading an export does not
+        # import PyTorch.
+        from Agents.rl.tdgammon.TDGammonNN import TDGammonNNQFunction
+        qfunction_nn:TDGammonNNQFunction = TDGammonNNQFunction()
+        qfunction_nn.load_policy(filepath)
+        qfunction_nn.export_policy(numpy_filepath)
+
+    qfunction:TDGammonNumpyQFunction = TDGammonNumpyQFunction(cache_capacity)
+    qfunction.load_policy(numpy_filepath)
+    return qfunction
+
+# END FILE ----------------------------------------------------------- #
@@ -7,9 +7,9 @@
 
 # IMPORTS ------------------------------------------------------------ #
 
-import random
-from Agents.rl.tdgammon.TDGammonNN import TDGammonNNQFunction
-from Agents.rl.tdgammon.TDGammonMDP import TDGammonMDP
+import numpy as np
+from Agents.rl.template.qfunction import QFunction
+from Agents.rl.tdgammon.TDGammonMDP import TDGammonMDP, select_greedy_index
 from BackgammonGame.backgammon_model import BackgammonState, BackgammonRules
 from ExtendedFormGame.template import Agent
 
@@ -26,8 +26,10 @@ class myAgent(Agent):
     def __init__(self,_id: int) -> None:
         super().__init__(_id)
     
-        # Define data structures to support off-policy TD learning.
-        self.qfunction:TDGammonNNQFunction = None
+        # Define data structures to support off-policy TD learning, where
+        # the Q-function is either a TDGammonNNQFunction or a
+        # TDGammonNumpyQFunction provided by the runner.
+        self.qfunction:QFunction = None
         self.game_rules:BackgammonRules = BackgammonRules()
         self.mdp:TDGammonMDP = TDGammonMDP(self.qfunction, self.game_rules)
         self.turn:int = 0
@@ -46,22 +48,16 @@ class myAgent(Agent):
         Returns:
             Action: Selected action instance.
         """
-        # Turn on eval mode.
-        self.qfunction.nn.eval()
+        # Evaluate a single action for each distinct outcome position,
+        # with the afterstates reached in the play tree.
+        actions, afterstates = zip(*self.game_rules.get_legal_afterstates(
+            game_state, self.id, unique_positions=True))
+        afterstates:list[BackgammonState] = list(afterstates)
 
-        # Select the highest estimated outcome state value.
-        max_value:float = float("-inf")
-        max_actions:list[tuple] = []
-
-        for a in actions:
-            tmp_game_state_p:BackgammonState = self.mdp.get_next_state(game_state, a, self.id)
-            tmp_value:float = self.qfunction.get_q_value(tmp_game_state_p, None)[self.id]
-            if tmp_value > max_value:
-                max_value = tmp_value
-                max_actions = [a]
-            elif tmp_value == max_value:
-                max_actions.append(a)
+        # Evaluate the afterstate of every action in a single batch.
+        values:np.ndarray = self.qfunction.get_q_values(afterstates)
 
-        return random.choice(max_actions)  
+        # Select the highest estimated outcome state value.
+        return actions[select_greedy_index(values[:, self.id])]
 
 # END ---------------------------------------------------------------- #
\ No newline at end of file
@@ -192,12 +192,13 @@ class UCT(Bandit):
         max_actions:list[tuple] = []
         max_value:float = float("-inf")
 
-        # Argmax action for UCB1 approach.
+        # Argmax action for UCB1 approach, with counts keyed on the
+        # Zobrist key of the position rather than the mutable game state.
         for action in actions:
             value:float = (self.qfunction.get_q_value(game_state, action)
                            + (2 * self.explore 
-                              * (math.sqrt((2 * math.log(self.times_selected[str(game_state)]))
-                                            / self.times_selected[(str(action), str(game_state))]))
+                              * (math.sqrt((2 * math.log(self.times_selected[game_state.zobrist_key]))
+                                            / self.times_selected[(str(action), game_state.zobrist_key)]))
                             ))
             
             if value > max_value:
@@ -208,8 +209,8 @@ class UCT(Bandit):
         
         # Random selection for tie-breaking.
         result = random.choice(max_actions)
-        self.times_selected[(str(result), str(game_state))] += 1
-        self.times_selected[str(game_state)] += 1
+        self.times_selected[(str(result), game_state.zobrist_key)] += 1
+        self.times_selected[game_state.zobrist_key] += 1
         return result
     
     def __str__(self):
@@ -39,6 +39,21 @@ class MDP():
         """
         return self.game_rules.get_legal_actions(game_state, agent_id)
 
+    def get_random_action(self, game_state:GameState,
+                          agent_id:int) -> tuple:
+        """ get_random_action
+        Return a random legal action using the game rules, such as for
+        exploration or rollouts.
+
+        Args:
+            game_state (GameState): State s
+            agent_id (int): Integer representing agent id.
+
+        Returns:
+            tuple: A tuple representing the action.
+        """
+        return self.game_rules.get_random_action(game_state, agent_id)
+
     def get_next_state(self, game_state:GameState, action:tuple,
                        agent_id:int) -> GameState:
         """ get_next_state
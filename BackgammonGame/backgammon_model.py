@@ -9,10 +9,10 @@
 
 # IMPORTS ------------------------------------------------------------ #
 
-from copy import deepcopy
-from queue import LifoQueue
+from array import array
 import random
 from ExtendedFormGame.template import GameState, GameRules, Action
+from ExtendedFormGame.utils import LRUCache
 from BackgammonGame.backgammon_tree import PlayNode
 import numpy as np
 
@@ -30,6 +30,137 @@ WHITE_HOME_BORDER:int = 6
 INIT_BOARD_CONFIG = [(1,2), (12,5), (17,3), (19,5)]
 DOUBLES_MULTIPLIER:int = 4
 CHECKERS_BLOCKED:int = 2
+NUM_CHECKERS:int = 15
+NUM_POINTS:int = 26
+# State buffer layout
+BLACK_BAR_INDEX:int = 26
+WHITE_BAR_INDEX:int = 27
+AGENT_INDEX:int = 28
+DICE_INDEX:int = 29
+STATE_BUFFER_SIZE:int = 31
+# Move tables indexed by [agent_id][from_point][face], where the bar is
+# the opposing agent's home point.
+AGENT_SIGN:tuple = (1, -1)
+MOVE_DESTINATION:tuple = (
+    tuple(tuple(min(point + face, BLACK_HOME_POINT)
+                for face in range(MAX_FACE_VALUE + 1))
+          for point in range(NUM_POINTS)),
+    tuple(tuple(max(point - face, WHITE_HOME_POINT)
+                for face in range(MAX_FACE_VALUE + 1))
+          for point in range(NUM_POINTS)))
+MOVE_BEARS_OFF:tuple = (
+    tuple(tuple(point + face >= BLACK_HOME_POINT
+                for face in range(MAX_FACE_VALUE + 1))
+          for point in range(NUM_POINTS)),
+    tuple(tuple(point - face <= WHITE_HOME_POINT
+                for face in range(MAX_FACE_VALUE + 1))
+          for point in range(NUM_POINTS)))
+MOVE_OVERSHOOTS:tuple = (
+    tuple(tuple(point + face > BLACK_HOME_POINT
+                for face in range(MAX_FACE_VALUE + 1))
+          for point in range(NUM_POINTS)),
+    tuple(tuple(point - face < WHITE_HOME_POINT
+                for face in range(MAX_FACE_VALUE + 1))
+          for point in range(NUM_POINTS)))
+# Zobrist keys indexed by [buffer index][value + NUM_CHECKERS], for the
+# buffer indices describing the position (i.e. excluding the dice).
+ZOBRIST_SEED:int = 42
+_zobrist_random:random.Random = random.Random(ZOBRIST_SEED)
+ZOBRIST_KEYS:tuple = tuple(
+    tuple(_zobrist_random.getrandbits(64)
+          for value in range(-NUM_CHECKERS, NUM_CHECKERS + 1))
+    for index in range(DICE_INDEX))
+# Pip counts contributed by each buffer value, indexed by
+# [buffer index][value + NUM_CHECKERS], where checkers on the bar are
+# BAR_PIP_DISTANCE pips from home.
+BAR_PIP_DISTANCE:int = 25
+BLACK_PIP_COUNTS:tuple = tuple(
+    tuple(max(value, 0) * (BAR_PIP_DISTANCE if index == BLACK_BAR_INDEX
+                           else BLACK_HOME_POINT - index
+                           if index < NUM_POINTS else 0)
+          for value in range(-NUM_CHECKERS, NUM_CHECKERS + 1))
+    for index in range(DICE_INDEX))
+WHITE_PIP_COUNTS:tuple = tuple(
+    tuple((max(value, 0) * BAR_PIP_DISTANCE if index == WHITE_BAR_INDEX
+           else max(-value, 0) * (index - WHITE_HOME_POINT)
+           if index < NUM_POINTS else 0)
+          for value in range(-NUM_CHECKERS, NUM_CHECKERS + 1))
+    for index in range(DICE_INDEX))
+# TD-Gammon features, where each point is encoded per agent by four
+# features, followed by the bar, borne-off, and turn features.
+NUM_TD_GAMMON_FEATURES:int = 198
+TD_GAMMON_POINT_FEATURES:int = 4
+TD_GAMMON_WHITE_OFFSET:int = 96
+TD_GAMMON_BAR_OFFSET:int = 192
+TD_GAMMON_OFF_OFFSET:int = 194
+TD_GAMMON_TURN_OFFSET:int = 196
+TD_GAMMON_POINT_ROWS:tuple = tuple(
+    array("f", [1.0] * num_checkers
+               + [0.0] * (TD_GAMMON_POINT_FEATURES - num_checkers))
+    if num_checkers < TD_GAMMON_POINT_FEATURES
+    else array("f", [1.0, 1.0, 1.0, (num_checkers - 3) / 2])
+    for num_checkers in range(NUM_CHECKERS + 1))
+TD_GAMMON_POINT_TABLE:np.ndarray = np.array(TD_GAMMON_POINT_ROWS,
+                                            dtype=np.float32)
+def _build_td_gammon_patches() -> tuple:
+    """_build_td_gammon_patches
+    Builds the TD-Gammon feature patches of each buffer index, excluding
+    the dice.
+
+    Returns:
+        tuple: Feature patches indexed by [buffer index], each a tuple of
+        (start, stop, rows) where rows[value + NUM_CHECKERS] are the
+        features [start, stop) for that buffer value.
+    """
+    buffer_values:range = range(-NUM_CHECKERS, NUM_CHECKERS + 1)
+    patches:list = []
+    for index in range(DICE_INDEX):
+        if WHITE_HOME_POINT < index < BLACK_HOME_POINT:
+            # Points, encoded for both agents.
+            start:int = TD_GAMMON_POINT_FEATURES * (index - 1)
+            patches.append((
+                (start, start + TD_GAMMON_POINT_FEATURES,
+                 tuple(TD_GAMMON_POINT_ROWS[max(value, 0)]
+                       for value in buffer_values)),
+                (TD_GAMMON_WHITE_OFFSET + start,
+                 TD_GAMMON_WHITE_OFFSET + start + TD_GAMMON_POINT_FEATURES,
+                 tuple(TD_GAMMON_POINT_ROWS[max(-value, 0)]
+                       for value in buffer_values))))
+        elif index == AGENT_INDEX:
+            patches.append((
+                (TD_GAMMON_TURN_OFFSET, TD_GAMMON_TURN_OFFSET + 2,
+                 tuple(array("f", [value == BLACK_ID, value == WHITE_ID])
+                       for value in buffer_values)),))
+        else:
+            # Home points and bars, encoded as half the checkers.
+            start:int = {BLACK_HOME_POINT: TD_GAMMON_OFF_OFFSET,
+                         WHITE_HOME_POINT: TD_GAMMON_OFF_OFFSET + 1,
+                         BLACK_BAR_INDEX: TD_GAMMON_BAR_OFFSET,
+                         WHITE_BAR_INDEX: TD_GAMMON_BAR_OFFSET + 1}[index]
+            patches.append((
+                (start, start + 1,
+                 tuple(array("f", [abs(value) / 2])
+                       for value in buffer_values)),))
+    return tuple(patches)
+TD_GAMMON_PATCHES:tuple = _build_td_gammon_patches()
+# Position IDs pack the checkers of each agent as in the GNU Backgammon
+# position ID, i.e. for each point from the agent's point 1 up to its
+# bar, a run of ones for the checkers on the point closed by a zero,
+# followed by a byte holding the agent to move. Points are listed as
+# (buffer index, sign) by agent.
+POSITION_ID_BITS:int = 80
+POSITION_ID_SIZE:int = POSITION_ID_BITS // 8 + 1
+POSITION_ID_POINTS:tuple = (
+    tuple((point, 1) for point in range(BLACK_HOME_POINT - 1,
+                                        WHITE_HOME_POINT, -1))
+    + ((BLACK_BAR_INDEX, 1),),
+    tuple((point, -1) for point in range(WHITE_HOME_POINT + 1,
+                                         BLACK_HOME_POINT))
+    + ((WHITE_BAR_INDEX, 1),))
+POSITION_ID_INDICES:np.ndarray = np.array(
+    [index for points in POSITION_ID_POINTS for index, _ in points])
+POSITION_ID_SIGNS:np.ndarray = np.array(
+    [sign for points in POSITION_ID_POINTS for _, sign in points])
 # Board States
 ON_BAR:int = -1
 NORMAL:int = 0
@@ -41,7 +172,12 @@ WINNING_SCORE:int = 1
 # CLASS DEF ---------------------------------------------------------- #
 
 class BackgammonState(GameState):
-    
+
+    # Restrict instances to the state buffer, and the fields maintained
+    # incrementally alongside it, to keep copies cheap.
+    __slots__ = ("board", "zobrist_key", "black_pips", "white_pips",
+                 "features")
+
     def __init__(self,
                  num_agents:int =NUM_BACKGAMMON_AGENTS,
                  agent_id:int =BLACK_ID) -> None:
@@ -50,6 +186,20 @@ class BackgammonState(GameState):
         version of the representation proposed by Lishout, Chaslot, and
         Uiterwijk.
 
+        The representation is stored in a single fixed-size int8 buffer,
+        with the layout:
+        - [0, 25]: Points content, where +x indicates x black checkers,
+          -x indicates x white checkers, and points 0 and 25 are the
+          home points storing the borne-off checkers.
+        - BLACK_BAR_INDEX, WHITE_BAR_INDEX: Checkers taken (on the bar).
+        - AGENT_INDEX: Agent ID of the side to move.
+        - DICE_INDEX: The two dice faces.
+
+        A 64-bit Zobrist key of the position (excluding the dice), the
+        pip counts of both agents, and the float32 TD-Gammon feature
+        vector, are maintained alongside the buffer, provided the buffer
+        is only modified through BackgammonState.write.
+
         References List:
             Van Lishout, François & Chaslot, Guillaume & Uiterwijk, Jos.
             (2007). Monte-Carlo tree search in backgammon. Computer
@@ -66,37 +216,25 @@ class BackgammonState(GameState):
         assert (num_agents == 2)
         assert (agent_id == 0)
 
-        # Initialise GameState attributes.
-        self.num_agents = num_agents
-        self.current_agent_id = agent_id
-
-        # Initialise the board state attributes.
-        # TODO: Remove the Lishout representation to take advantage of
-        # modern data structures (e.g. a dictionary indexed on ID storing the lists).
-        # This will reduced the duplicate specifications in the model below.
-        self.points_content = [0] * 26
-        self.black_checkers = []
-        self.white_checkers = []
+        # Initialise the board state buffer.
+        self.board:array = array("b", bytes(STATE_BUFFER_SIZE))
         for point, num_checkers in INIT_BOARD_CONFIG:
             # Black Setup
-            self.points_content[point] = num_checkers
-            self.black_checkers.append(point)
+            self.board[point] = num_checkers
             # White Setup
-            self.points_content[BLACK_HOME_POINT - point] = -num_checkers
-            self.white_checkers = [BLACK_HOME_POINT - point] + self.white_checkers
-        self.black_checkers_taken = 0
-        self.white_checkers_taken = 0
+            self.board[BLACK_HOME_POINT - point] = -num_checkers
+        self.board[AGENT_INDEX] = agent_id
+        self._recompute()
 
         # Initialise the dice attributes.
-        self.dice = [random.randint(MIN_FACE_VALUE, MAX_FACE_VALUE),
-                     random.randint(MIN_FACE_VALUE, MAX_FACE_VALUE)]
+        self.roll()
     
     def __str__(self) -> str:
         output: str = ""
-        tmp_points_content = deepcopy(self.points_content)
+        tmp_points_content = list(self.points_content)
         
         # Write board labels.
-        for i in range(len(self.points_content)):
+        for i in range(len(tmp_points_content)):
             output += str(i) + " "
         output += "\n"
         
@@ -127,24 +265,295 @@ class BackgammonState(GameState):
         output += str("DICE: "+str(self.dice[0])+" "+str(self.dice[1]))
         return output
 
+    def __eq__(self, other:object) -> bool:
+        if not isinstance(other, BackgammonState):
+            return NotImplemented
+        return self.board == other.board
+
+    def __hash__(self) -> int:
+        # NOTE: States are mutable, so states should not be modified
+        # while stored in a hashed collection.
+        return self.zobrist_key
+
+    def __copy__(self) -> "BackgammonState":
+        return self.clone()
+
+    def __deepcopy__(self, memo:dict) -> "BackgammonState":
+        return self.clone()
+
+    def clone(self) -> "BackgammonState":
+        """clone
+        Returns a copy of the BackgammonState, copying the state buffer
+        rather than walking the object graph.
+
+        Returns:
+            BackgammonState: Copy of BackgammonState s.
+        """
+        game_state:BackgammonState = BackgammonState.__new__(BackgammonState)
+        game_state.board = self.board[:]
+        game_state.zobrist_key = self.zobrist_key
+        game_state.black_pips = self.black_pips
+        game_state.white_pips = self.white_pips
+        game_state.features = self.features[:]
+        return game_state
+
+    def raw_clone(self) -> "BackgammonState":
+        """raw_clone
+        Returns a copy of the BackgammonState without the TD-Gammon
+        features, so that writes to the copy do not patch the features.
+        Used for the states of move generation, whose features are only
+        computed for the afterstates returned.
+
+        Returns:
+            BackgammonState: Copy of BackgammonState s without features.
+        """
+        game_state:BackgammonState = BackgammonState.__new__(BackgammonState)
+        game_state.board = self.board[:]
+        game_state.zobrist_key = self.zobrist_key
+        game_state.black_pips = self.black_pips
+        game_state.white_pips = self.white_pips
+        game_state.features = None
+        return game_state
+
+    def write(self, index:int, value:int) -> None:
+        """write
+        Writes a value into the state buffer, and updates the Zobrist
+        key, pip counts, and TD-Gammon features of the position
+        incrementally. The features are skipped for copies made by
+        BackgammonState.raw_clone.
+
+        Args:
+            index (int): Index of the state buffer, excluding the dice.
+            value (int): Value to write.
+        """
+        old_value:int = self.board[index] + NUM_CHECKERS
+        new_value:int = value + NUM_CHECKERS
+        keys:tuple = ZOBRIST_KEYS[index]
+        self.zobrist_key ^= keys[old_value] ^ keys[new_value]
+        pip_counts:tuple = BLACK_PIP_COUNTS[index]
+        self.black_pips += pip_counts[new_value] - pip_counts[old_value]
+        pip_counts = WHITE_PIP_COUNTS[index]
+        self.white_pips += pip_counts[new_value] - pip_counts[old_value]
+        features:array = self.features
+        if features is not None:
+            for start, stop, rows in TD_GAMMON_PATCHES[index]:
+                features[start:stop] = rows[new_value]
+        self.board[index] = value
+
+    def _recompute(self) -> None:
+        """_recompute
+        Recomputes the fields maintained incrementally alongside the
+        state buffer from scratch.
+        """
+        self.zobrist_key:int = self._compute_zobrist_key()
+        self.black_pips:int = sum(
+            BLACK_PIP_COUNTS[index][self.board[index] + NUM_CHECKERS]
+            for index in range(DICE_INDEX))
+        self.white_pips:int = sum(
+            WHITE_PIP_COUNTS[index][self.board[index] + NUM_CHECKERS]
+            for index in range(DICE_INDEX))
+        self.features:array = array("f", bytes(4 * NUM_TD_GAMMON_FEATURES))
+        for index in range(DICE_INDEX):
+            for start, stop, rows in TD_GAMMON_PATCHES[index]:
+                self.features[start:stop] = rows[self.board[index]
+                                                 + NUM_CHECKERS]
+
+    def _patch_features(self, game_state:"BackgammonState") -> None:
+        """_patch_features
+        Computes the TD-Gammon features of the position from those of
+        another BackgammonState, patching the features of each buffer
+        index whose value differs.
+
+        Args:
+            game_state (BackgammonState): BackgammonState with features.
+        """
+        features:array = game_state.features[:]
+        for index, (value, other_value) in enumerate(zip(self.board,
+                                                         game_state.board)):
+            if index == DICE_INDEX:
+                break
+            if value != other_value:
+                for start, stop, rows in TD_GAMMON_PATCHES[index]:
+                    features[start:stop] = rows[value + NUM_CHECKERS]
+        self.features = features
+
+    def _compute_zobrist_key(self) -> int:
+        """_compute_zobrist_key
+        Returns the Zobrist key of the position computed from scratch.
+
+        Returns:
+            int: 64-bit Zobrist key.
+        """
+        zobrist_key:int = 0
+        for index in range(DICE_INDEX):
+            zobrist_key ^= ZOBRIST_KEYS[index][self.board[index] + NUM_CHECKERS]
+        return zobrist_key
+
+    def position_key(self) -> bytes:
+        """position_key
+        Returns a key identifying the position of the BackgammonState,
+        being the points content, checkers taken, and agent to move,
+        but not the dice.
+
+        Returns:
+            bytes: Position key.
+        """
+        return self.board[:DICE_INDEX].tobytes()
+
+    def position_id(self) -> bytes:
+        """position_id
+        Returns the compact position ID of the BackgammonState, being
+        the 80-bit checker layout of both agents and the agent to move,
+        but not the dice.
+
+        Returns:
+            bytes: Position ID of POSITION_ID_SIZE bytes.
+        """
+        board:array = self.board
+        bits:int = 0
+        offset:int = 0
+        for agent_points in POSITION_ID_POINTS:
+            for index, sign in agent_points:
+                num_checkers:int = max(board[index] * sign, 0)
+                bits |= ((1 << num_checkers) - 1) << offset
+                offset += num_checkers + 1
+
+        return (bits.to_bytes(POSITION_ID_BITS // 8, "little")
+                + bytes((board[AGENT_INDEX],)))
+
+    @classmethod
+    def from_position_id(cls, position_id:bytes,
+                         dice:list[int] = None) -> "BackgammonState":
+        """from_position_id
+        Returns the BackgammonState described by a position ID.
+
+        Args:
+            position_id (bytes): Position ID of POSITION_ID_SIZE bytes.
+            dice (list[int], optional): Dice of the state. Defaults to
+            None, rolling new dice.
+
+        Returns:
+            BackgammonState: BackgammonState s.
+        """
+        assert (len(position_id) == POSITION_ID_SIZE)
+
+        game_state:BackgammonState = cls.__new__(cls)
+        board:array = array("b", bytes(STATE_BUFFER_SIZE))
+        bits:int = int.from_bytes(position_id[:POSITION_ID_BITS // 8],
+                                  "little")
+        for agent_id, agent_points in enumerate(POSITION_ID_POINTS):
+            num_on_board:int = 0
+            for index, sign in agent_points:
+                # Count the run of ones closed by the next zero.
+                num_checkers:int = ((bits + 1) & ~bits).bit_length() - 1
+                bits >>= num_checkers + 1
+                if num_checkers:
+                    board[index] = num_checkers * sign
+                num_on_board += num_checkers
+            assert (num_on_board <= NUM_CHECKERS)
+
+            # Remaining checkers have been borne off.
+            home_point:int = (BLACK_HOME_POINT if agent_id == BLACK_ID
+                              else WHITE_HOME_POINT)
+            board[home_point] = ((NUM_CHECKERS - num_on_board)
+                                 * AGENT_SIGN[agent_id])
+        board[AGENT_INDEX] = position_id[-1]
+
+        game_state.board = board
+        game_state._recompute()
+        if dice is None:
+            game_state.roll()
+        else:
+            game_state.dice = dice
+        return game_state
+
     def roll(self) -> None:
         """roll
         Roll the dice to generate a new set of two dice representation.
         """
 
-        self.dice = [random.randint(MIN_FACE_VALUE, MAX_FACE_VALUE),
-                     random.randint(MIN_FACE_VALUE, MAX_FACE_VALUE)]
+        self.board[DICE_INDEX] = random.randint(MIN_FACE_VALUE, MAX_FACE_VALUE)
+        self.board[DICE_INDEX + 1] = random.randint(MIN_FACE_VALUE, MAX_FACE_VALUE)
         
         return None
 
+    # Buffer accessors ----------------------------------------------- #
+    @property
+    def num_agents(self) -> int:
+        return NUM_BACKGAMMON_AGENTS
+
+    @property
+    def current_agent_id(self) -> int:
+        return self.board[AGENT_INDEX]
+
+    @current_agent_id.setter
+    def current_agent_id(self, agent_id:int) -> None:
+        self.write(AGENT_INDEX, agent_id)
+
+    @property
+    def dice(self) -> list[int]:
+        return [self.board[DICE_INDEX], self.board[DICE_INDEX + 1]]
+
+    @dice.setter
+    def dice(self, dice:list[int]) -> None:
+        [self.board[DICE_INDEX], self.board[DICE_INDEX + 1]] = dice
+
+    @property
+    def points_content(self) -> memoryview:
+        """points_content
+        Returns a read-only view of the points content in the state
+        buffer.
+        """
+        return memoryview(self.board).toreadonly()[:NUM_POINTS]
+
+    @property
+    def black_checkers(self) -> list[int]:
+        """black_checkers
+        Returns the points held by black in increasing order.
+        """
+        return [point for point in range(NUM_POINTS)
+                if self.board[point] > 0]
+
+    @property
+    def white_checkers(self) -> list[int]:
+        """white_checkers
+        Returns the points held by white in decreasing order.
+        """
+        return [point for point in range(NUM_POINTS - 1, -1, -1)
+                if self.board[point] < 0]
+
+    @property
+    def black_checkers_taken(self) -> int:
+        return self.board[BLACK_BAR_INDEX]
+
+    @black_checkers_taken.setter
+    def black_checkers_taken(self, num_checkers:int) -> None:
+        self.write(BLACK_BAR_INDEX, num_checkers)
+
+    @property
+    def white_checkers_taken(self) -> int:
+        return self.board[WHITE_BAR_INDEX]
+
+    @white_checkers_taken.setter
+    def white_checkers_taken(self, num_checkers:int) -> None:
+        self.write(WHITE_BAR_INDEX, num_checkers)
+
 
 class BackgammonRules(GameRules):
     
-    def __init__(self):
+    def __init__(self, action_cache_capacity:int = 0):
         """__init__
         Initialise an instance of GameRules class.
+
+        Args:
+            action_cache_capacity (int, optional): Number of legal
+            action lists to memoise by position and dice. Defaults to
+            0, disabling the cache.
         """
         super().__init__(NUM_BACKGAMMON_AGENTS)
+        self.action_cache:LRUCache = (LRUCache(action_cache_capacity)
+                                      if action_cache_capacity > 0
+                                      else None)
 
     def initial_game_state(self) -> BackgammonState:
         """initial_game_state
@@ -156,11 +565,17 @@ class BackgammonRules(GameRules):
         return BackgammonState(self.num_agents)
 
     def get_legal_actions(self, game_state:BackgammonState,
-                          agent_id:int) -> list[Action]:
+                          agent_id:int,
+                          unique_positions:bool = False) -> list[Action]:
         """get_legal_actions
         Returns a list of Action instances that are legal for Agent ID
         in a given GameState using the approach proposed by Berliner.
 
+        Different play sequences frequently reach the same position
+        (e.g. playing a 3 then a 5, or a 5 then a 3), so the list can
+        optionally be reduced to one representative action for each
+        distinct resulting position.
+
         References List:
             Hans J. Berliner (1977) BKG -- A Program that plays
             Backgammon. Carnegie-Mellon University.
@@ -168,22 +583,228 @@ class BackgammonRules(GameRules):
         Args:
             game_state (BackgammonState): BackgammonState s.
             agent_id (int): Agent ID.
+            unique_positions (bool, optional): Return only the first
+            action reaching each distinct position. Defaults to False.
 
         Returns:
             list[Action]: List of Action instances that are valid in
             BackgammonState s.
         """
-        # Validate dice to determine available moves.
+        if self.action_cache is None:
+            return self._generate_legal_actions(game_state,
+                                                unique_positions)
+
+        # Legal actions depend on the position and the dice, but not on
+        # the order of the dice.
+        key:tuple = (game_state.position_key()
+                     + bytes(sorted(game_state.dice)), unique_positions)
+        actions:tuple = self.action_cache.get(key)
+        if actions is None:
+            actions = tuple(tuple(action) for action in
+                            self._generate_legal_actions(game_state,
+                                                         unique_positions))
+            self.action_cache.put(key, actions)
+
+        # Return new lists, so callers cannot modify the cached actions.
+        return [list(action) for action in actions]
+
+    def get_legal_afterstates(self, game_state:BackgammonState,
+                              agent_id:int,
+                              unique_positions:bool = False) -> list[tuple[Action, BackgammonState]]:
+        """get_legal_afterstates
+        Returns each Action instance that is legal for Agent ID in a
+        given GameState, paired with its afterstate. The afterstates
+        are the leaf states of the play tree, which already have the
+        moves applied, so agents scoring afterstates need not replay
+        each action with generate_afterstate. As with
+        generate_afterstate, the dice are not rolled for the next
+        agent.
+
+        Args:
+            game_state (BackgammonState): BackgammonState s.
+            agent_id (int): Agent ID.
+            unique_positions (bool, optional): Return only the first
+            action reaching each distinct position. Defaults to False.
+
+        Returns:
+            list[tuple[Action, BackgammonState]]: List of Action
+            instances that are valid in BackgammonState s, each paired
+            with its afterstate.
+        """
+        # Assert that actions are being generated for the correct agent.
+        assert(agent_id == game_state.current_agent_id)
+
+        root, rank = self._generate_play_tree_root(game_state)
+        afterstates:list[tuple] = self._extract_actions(root, rank,
+                                                        unique_positions,
+                                                        with_states=True)
+
+        # Leaf states are clones owned by the play tree, so update the
+        # game state id in place, and compute the TD-Gammon features
+        # that the play tree does not maintain.
+        if game_state.current_agent_id == BLACK_ID:
+            next_agent_id:int = WHITE_ID
+        else:
+            next_agent_id:int = BLACK_ID
+        for _, afterstate in afterstates:
+            afterstate.current_agent_id = next_agent_id
+            afterstate._patch_features(game_state)
+
+        return afterstates
+
+    def get_random_action(self, game_state:BackgammonState,
+                          agent_id:int) -> Action:
+        """get_random_action
+        Returns a random Action instance that is legal for Agent ID in
+        a given GameState, without generating the play tree.
+
+        Moves are drawn at random on a single working copy of the game
+        state, backtracking from moves that cannot be followed by a
+        move for every remaining face. The sample is therefore uniform
+        over the moves that complete a play at each step, which
+        approximates, rather than equals, a uniform draw over the
+        legal actions. When no play uses every face, the search has
+        exhausted the play tree, and the action is drawn uniformly
+        from get_legal_actions, which applies the rules for partial
+        plays.
+
+        Args:
+            game_state (BackgammonState): BackgammonState s.
+            agent_id (int): Agent ID.
+
+        Returns:
+            Action: Action instance that is valid in BackgammonState s.
+        """
+        # Assert that the action is being drawn for the correct agent.
+        assert(agent_id == game_state.current_agent_id)
+
+        action:list[tuple] = self._sample_play_sequence(
+            game_state.raw_clone(), self._get_faces(game_state), 0)
+        if action is None:
+            return random.choice(self.get_legal_actions(game_state,
+                                                        agent_id))
+        return action
+
+    def _sample_play_sequence(self, game_state:BackgammonState,
+                              faces:list[int],
+                              min_source:int) -> list[tuple]:
+        """_sample_play_sequence
+        Returns a random play sequence using every face, by a DFS of
+        the play tree that visits the moves from each node in random
+        order and stops at the first complete sequence.
+
+        Args:
+            game_state (BackgammonState): BackgammonState reached by
+            the sequence so far, which is restored before returning.
+            faces (list[int]): List of unused faces in the play
+            sequence, in decreasing order.
+            min_source (int): Minimum source point of the next move, as
+            a distance travelled from the agent's starting bar.
+
+        Returns:
+            list[tuple]: List of moves, or None if no sequence uses
+            every face.
+        """
+        # Validate exit condition: no more faces to consider.
+        if len(faces) == 0:
+            return []
+
+        # Determine the moves using each distinct unused face.
+        board_state = self._evaluate_board_state(game_state)
+        candidates:list[tuple] = []
+        for i in range(len(faces)):
+            # Faces are sorted, so skip repeated faces.
+            if i > 0 and faces[i] == faces[i - 1]:
+                continue
+            unused_faces:list[int] = faces[:i] + faces[i + 1:]
+            for move in self._generate_moves(game_state, board_state,
+                                             faces[i], min_source):
+                candidates.append((move, unused_faces))
+        random.shuffle(candidates)
+
+        for move, unused_faces in candidates:
+            undo_token:tuple = self.apply_move(game_state, move)
+            sequence:list[tuple] = self._sample_play_sequence(
+                game_state, unused_faces,
+                self._get_min_source(game_state, move, unused_faces))
+            self.undo_move(game_state, undo_token)
+            if sequence is not None:
+                return [move] + sequence
+        return None
+
+    def _get_faces(self, game_state:BackgammonState) -> list[int]:
+        """_get_faces
+        Returns the faces to be played for the dice in GameState s, in
+        decreasing order.
+
+        Args:
+            game_state (BackgammonState): BackgammonState s.
+
+        Returns:
+            list[int]: List of faces.
+        """
         [dice_a, dice_b] = game_state.dice
-        faces = []
         if dice_a == dice_b:
-            faces = [dice_a] * DOUBLES_MULTIPLIER
-        else:
-            faces = game_state.dice
-        # Rules require that if only one move can be played, it is done
-        # with the largest rolled face. As such, each play sequence,
-        # will be generated with this property in mind.
-        faces.sort(reverse=True)
+            return [dice_a] * DOUBLES_MULTIPLIER
+        return [max(dice_a, dice_b), min(dice_a, dice_b)]
+
+    def _get_min_source(self, game_state:BackgammonState, move:tuple,
+                        faces:list[int]) -> int:
+        """_get_min_source
+        Returns the minimum source point of the move following a move.
+        With doubles, moves are played in non-decreasing order of
+        their source point, otherwise any source point is allowed.
+
+        Args:
+            game_state (BackgammonState): BackgammonState s.
+            move (tuple): Three tuple of the move played.
+            faces (list[int]): List of unused faces after the move.
+
+        Returns:
+            int: Minimum source point, as a distance travelled from the
+            agent's starting bar.
+        """
+        if faces and faces[0] == move[2]:
+            # Doubles: order the remaining moves by source point.
+            if game_state.current_agent_id == BLACK_ID:
+                return move[0]
+            return BLACK_HOME_POINT - move[0]
+        return 0
+
+    def _generate_legal_actions(self, game_state:BackgammonState,
+                                unique_positions:bool = False) -> list[Action]:
+        """_generate_legal_actions
+        Returns a list of Action instances that are legal in a given
+        GameState, generated from the play tree.
+
+        Args:
+            game_state (BackgammonState): BackgammonState s.
+            unique_positions (bool, optional): Return only the first
+            action reaching each distinct position. Defaults to False.
+
+        Returns:
+            list[Action]: List of Action instances that are valid in
+            BackgammonState s.
+        """
+        root, rank = self._generate_play_tree_root(game_state)
+
+        # Extract play sequences using DFS
+        return self._extract_actions(root, rank, unique_positions)
+
+    def _generate_play_tree_root(self, game_state:BackgammonState) -> tuple[PlayNode, tuple]:
+        """_generate_play_tree_root
+        Generates the play tree of a given GameState on a clone of the
+        GameState.
+
+        Args:
+            game_state (BackgammonState): BackgammonState s.
+
+        Returns:
+            tuple[PlayNode, tuple]: Root node of the play tree, and the
+            rank of the legal play sequences.
+        """
+        # Validate dice to determine available moves.
+        faces:list[int] = self._get_faces(game_state)
 
         # TECH DEBT: This shuold go to a log file!
         # print(game_state)
@@ -192,72 +813,110 @@ class BackgammonRules(GameRules):
         # else:
         #     print("TURN "+str(self.action_counter)+": WHITE")
 
-        # Generate play sequences.
+        # Generate play sequences on a single working copy of the game
+        # state, in a single pass over both face orders. Rules require
+        # that as many faces as possible are played, and if only one
+        # face can be played, it is the largest, so the rank of the best
+        # play sequence is tracked to prune sequences during generation.
+        # The working copy, and the leaf states cloned from it, do not
+        # maintain the TD-Gammon features.
+        game_state = game_state.raw_clone()
         root = PlayNode(None, game_state)
-        self._generate_play_tree(root, faces)
-        if len(faces) != DOUBLES_MULTIPLIER:
-            faces.sort()
-            self._generate_play_tree(root, faces)
+        best_rank:list[tuple] = [(0, 0)]
+        self._generate_play_tree(root, game_state, faces, (0, 0),
+                                 best_rank, 0)
 
-        # Extract play sequences using DFS
-        return self._extract_actions(root)
+        return root, best_rank[0]
     
-    def _extract_actions(self, root:PlayNode) -> list[tuple]:
+    def _extract_actions(self, root:PlayNode, rank:tuple,
+                         unique_positions:bool = False,
+                         with_states:bool = False) -> list:
         """_extract_actions
-        DFS of play tree to extract valid action sequences.
+        Iterative DFS of play tree to extract valid action sequences.
+        Each sequence is built as an immutable tuple extending its
+        parent's sequence, so no sequence is copied per edge.
 
         Args:
             root (PlayNode): Root node of play tree.
+            rank (tuple): Number of moves and largest face of the legal
+            play sequences, used to skip the sequences that were added
+            to the tree before a better sequence was found.
+            unique_positions (bool, optional): Extract only the first
+            action reaching each distinct position. Defaults to False.
+            with_states (bool, optional): Pair each sequence with the
+            state of its leaf node. Defaults to False.
 
         Returns:
-            list[tuple]: _description_
+            list: Extracted action sequences, or (sequence, state)
+            pairs if with_states is set.
         """
+        actions:list = []
+        positions:set = set() if unique_positions else None
+        (num_moves, largest_face) = rank
 
         # Initialise stack.
-        stack = LifoQueue(maxsize=0)
-        stack.put((root, []))
-
-        # Perform DFS extraction
-        return self._extract_play_tree_dfs(stack, [])
-
-
-    def _extract_play_tree_dfs(self, stack:LifoQueue, actions:list) -> list:
-        """_extract_play_tree_dfs
+        stack:list[tuple] = [(root, ())]
+
+        # Perform DFS extraction.
+        while stack:
+            node, sequence = stack.pop()
+
+            # Evaluate end condition.
+            if not node.children:
+                # Skip sequences that are outranked.
+                if (len(sequence) != num_moves
+                    or (num_moves == 1 and sequence[0][2] != largest_face)):
+                    continue
+                if positions is not None:
+                    # Skip actions reaching an extracted position.
+                    position:bytes = node.state.position_key()
+                    if position in positions:
+                        continue
+                    positions.add(position)
+                if with_states:
+                    actions.append((list(sequence), node.state))
+                else:
+                    actions.append(list(sequence))
+                continue
 
-        Args:
-            stack (LifoQueue): Stack for DFS.
-            actions (list): Set of extracted actions.
+            # Update stack with next depth of nodes, in reverse to
+            # extract the children in order.
+            for child in reversed(node.children):
+                stack.append((child, sequence + (child.move,)))
 
-        Returns:
-            list: Extracted actions.
-        """
-        # Extract next element in stack.
-        node, sequence = stack.get()
-
-        # Evaluate end condition.
-        if len(node.children) == 0:
-            actions.append(sequence)
-            return actions
-
-        # Update stack with next depth of nodes.
-        for child in node.children:
-            new_sequence = deepcopy(sequence)
-            new_sequence.append(child.move)
-            stack.put((child, new_sequence))
-            # Continue DFS.
-            self._extract_play_tree_dfs(stack, actions)
-        
         return actions
-        
 
-    def _generate_play_tree(self, root:PlayNode, faces:list[int]) -> None:
+    def _generate_play_tree(self, root:PlayNode,
+                            game_state:BackgammonState,
+                            faces:list[int], rank:tuple,
+                            best_rank:list[tuple],
+                            min_source:int) -> None:
         """_generate_play_tree
+        Generates the play tree below a node by applying and undoing
+        each move on a single mutable game state, rather than copying
+        the game state for every node. Each distinct unused face is
+        played from the node, so both face orders are generated in a
+        single tree.
+
+        With doubles, every ordering of the same moves reaches the same
+        position, so moves are only generated in non-decreasing order of
+        their source point along the direction of travel. Playing the
+        rearmost checkers first never prevents a later move, so each
+        multiset of moves is generated exactly once.
 
         Args:
             root (PlayNode): Node of a tree that stores the play
             sequences.
-            faces (list[int]): List of faces to be used in play
-            sequence.
+            game_state (BackgammonState): BackgammonState reached at
+            the root node, which is restored before returning.
+            faces (list[int]): List of unused faces in the play
+            sequence, in decreasing order.
+            rank (tuple): Number of moves and largest face played to
+            reach the root node.
+            best_rank (list[tuple]): Single element list storing the
+            best rank of a play sequence found so far.
+            min_source (int): Minimum source point of the next move, as
+            a distance travelled from the agent's starting bar.
         """
 
         # Validate exit condition: no more faces to consider.
@@ -265,223 +924,146 @@ class BackgammonRules(GameRules):
             return root
         
         # Validate board state
-        board_state = self._evaluate_board_state(root.state)
-        if board_state == ON_BAR:
-            
-            # Determine move.
-            if root.state.current_agent_id == BLACK_ID:
-                move = (WHITE_HOME_POINT,
-                        WHITE_HOME_POINT + faces[0],
-                        faces[0])
-            else:
-                move = (BLACK_HOME_POINT,
-                        BLACK_HOME_POINT - faces[0],
-                        faces[0])
-                
-            if self._evaluate_valid_move(root.state, move):
-                # Generate new state after applying move.
-                game_state_prime = self._update_game_state(deepcopy(root.state), move)
-                # Create a new search state node storing next state, and move applied to get it there.
-                node_prime = PlayNode(root, game_state_prime, move)
-                # Add new search state node to set of children.
-                root.children.append(node_prime)
-                # Recursive call on new search state node with unsused faces.
-                self._generate_play_tree(node_prime, faces[1:])
-
-        elif board_state == BEAR_OFF:
-            
-            if root.state.current_agent_id == BLACK_ID:
-                
-                # Determine move.
-                for point in root.state.black_checkers:
-                    move = (point,
-                            min(point + faces[0], BLACK_HOME_POINT),
-                            faces[0])
-                    
-                    if self._evaluate_valid_bear_off(root.state, move):
-                        # Generate new state after applying move.
-                        game_state_prime = self._update_game_state(deepcopy(root.state), move)
-                        # Create a new search state node storing next state, and move applied to get it there.
-                        node_prime = PlayNode(root, game_state_prime, move)
-                        # Add new search state node to set of children.
-                        root.children.append(node_prime)
-                        # Recursive call on new search state node with unsused faces.
-                        self._generate_play_tree(node_prime, faces[1:])
-                    
-            else:
-
-                # Determine move.
-                for point in root.state.white_checkers:
-                    move = (point,
-                            max(point - faces[0], WHITE_HOME_POINT),
-                            faces[0])
-                    
-                    if self._evaluate_valid_bear_off(root.state, move):
-                        # Generate new state after applying move.
-                        game_state_prime = self._update_game_state(deepcopy(root.state), move)
-                        # Create a new search state node storing next state, and move applied to get it there.
-                        node_prime = PlayNode(root, game_state_prime, move)
-                        # Add new search state node to set of children.
-                        root.children.append(node_prime)
-                        # Recursive call on new search state node with unsused faces.
-                        self._generate_play_tree(node_prime, faces[1:])
-
-        elif board_state == NORMAL:
-            
-            if root.state.current_agent_id == BLACK_ID:
-                
-                # Determine move.
-                for point in root.state.black_checkers:
-                    move = (point,
-                            min(point + faces[0], BLACK_HOME_POINT),
-                            faces[0])
-                    
-                    if self._evaluate_valid_move(root.state, move):
-                        # Generate new state after applying move.
-                        game_state_prime = self._update_game_state(deepcopy(root.state), move)
-                        # Create a new search state node storing next state, and move applied to get it there.
-                        node_prime = PlayNode(root, game_state_prime, move)
-                        # Add new search state node to set of children.
-                        root.children.append(node_prime)
-                        # Recursive call on new search state node with unsused faces.
-                        self._generate_play_tree(node_prime, faces[1:])
-                    
-            else:
+        board_state = self._evaluate_board_state(game_state)
+        for i in range(len(faces)):
+            # Faces are sorted, so skip repeated faces.
+            if i > 0 and faces[i] == faces[i - 1]:
+                continue
+            face:int = faces[i]
+            unused_faces:list[int] = faces[:i] + faces[i + 1:]
+
+            for move in self._generate_moves(game_state, board_state,
+                                             face, min_source):
+                self._expand_play_node(root, game_state, move,
+                                       unused_faces, rank, best_rank)
+
+    def _generate_moves(self, game_state:BackgammonState,
+                        board_state:int, face:int,
+                        min_source:int = 0) -> list[tuple]:
+        """_generate_moves
+        Returns the valid moves using a single face in game state s.
+
+        A move is valid if its destination is not blocked by opposing
+        checkers, and if the move bears a checker off, the board is in
+        the BEAR_OFF board state and the move is either:
+        - an exact bear-off, or
+        - when a larger number is rolled, the furthest checker is
+        born-off.
 
-                # Determine move.
-                for point in root.state.white_checkers:
-                    move = (point,
-                            max(point - faces[0], WHITE_HOME_POINT),
-                            faces[0])
-                    
-                    if self._evaluate_valid_move(root.state, move):
-                        # Generate new state after applying move.
-                        game_state_prime = self._update_game_state(deepcopy(root.state), move)
-                        # Create a new search state node storing next state, and move applied to get it there.
-                        node_prime = PlayNode(root, game_state_prime, move)
-                        # Add new search state node to set of children.
-                        root.children.append(node_prime)
-                        # Recursive call on new search state node with unsused faces.
-                        self._generate_play_tree(node_prime, faces[1:])
-
-    def _evaluate_valid_move(self, game_state:BackgammonState,
-                             move:tuple) -> bool:
-        """_evaluate_valid_move
-        Returns a boolean indicating whether the move is valid for the
-        board state in ON_BAR or NORMAL board states.
-
-        Valid move if to_point is not blocked by opposing checkers,
-        assuming the following:
-        - The board is in ON_BAR or NORMAL board states.
-        - The from_point is held by the current ID.
-        - The move is a valid face for the current BackgammonState.
+        Destinations, bear-offs and overshoots are read from the move
+        tables, so each candidate is a table read and a board lookup.
 
         Args:
-            game_state (BackgammonState): Gamestate s.
-            move (tuple): Three tuple detailing fromPoint, toPoint, and
-            face value of a move.
+            game_state (BackgammonState): BackgammonState s.
+            board_state (int): Class of board state of s.
+            face (int): Face to be played.
+            min_source (int, optional): Minimum source point, as a
+            distance travelled from the agent's starting bar. Defaults
+            to 0.
 
         Returns:
-            bool: True if valid, False otherwise.
+            list[tuple]: List of valid moves.
         """
-        (from_point, to_point, face) = move
+        moves:list[tuple] = []
+        board:array = game_state.board
+        agent_id:int = board[AGENT_INDEX]
+        destinations:tuple = MOVE_DESTINATION[agent_id]
 
-        # Check if attempting to bear off.
-        if (abs(to_point - from_point) != face):
-            return False
+        # Points are blocked when the opposing agent holds at least
+        # CHECKERS_BLOCKED checkers, in which case the signed content
+        # from the agent's perspective is at most -CHECKERS_BLOCKED.
+        sign:int = AGENT_SIGN[agent_id]
 
-        if (game_state.current_agent_id == BLACK_ID
-            and game_state.points_content[to_point] > -CHECKERS_BLOCKED):
-            # Piece moving from bar.
-            if (from_point == WHITE_HOME_POINT
-                  and game_state.black_checkers_taken > 0):
-                return True
-            # Piece moving from board.
-            elif (to_point != BLACK_HOME_POINT):
-                assert(from_point in set(game_state.black_checkers))
-                return True
-            else:
-                return False
-            
-        elif (game_state.current_agent_id == WHITE_ID
-              and game_state.points_content[to_point] < CHECKERS_BLOCKED):
-            # Piece moving from bar.
-            if (from_point == BLACK_HOME_POINT
-                  and game_state.white_checkers_taken > 0):
-                return True
-            # Piece moving from board.
-            elif (to_point != WHITE_HOME_POINT):
-                assert(from_point in set(game_state.white_checkers))
-                return True
+        if board_state == ON_BAR:
+
+            # Determine move from the bar.
+            if agent_id == BLACK_ID:
+                from_point:int = WHITE_HOME_POINT
             else:
-                return False
-            
+                from_point:int = BLACK_HOME_POINT
+            to_point:int = destinations[from_point][face]
+            if board[to_point] * sign > -CHECKERS_BLOCKED:
+                moves.append((from_point, to_point, face))
+            return moves
+
+        # Determine the points held by the agent in order of travel,
+        # excluding the home point.
+        if agent_id == BLACK_ID:
+            points:range = range(max(min_source, WHITE_HOME_POINT + 1),
+                                 BLACK_HOME_POINT)
         else:
-            return False
-    
-    def _evaluate_valid_bear_off(self, game_state:BackgammonState,
-                                 move:tuple) -> bool:
-        """_evaluate_valid_bear_off
-        Returns a boolean indicating whether the move is valid for the
-        board state in the BEAR_OFF board state.
-
-        Valid move if the move is:
-        - an exact bear-off, or
-        - when a larger number is rolled, the furthest piece is
-        born-off,
-        - or is a valid move.
-
-        assuming the following:
-        - The board is in BEAR_OFF board state.
-        - The from_point is held by the current ID.
-        - The move is a valid face for the current BackgammonState.
+            points:range = range(min(BLACK_HOME_POINT - min_source,
+                                     BLACK_HOME_POINT - 1),
+                                 WHITE_HOME_POINT, -1)
+
+        # Determine the furthest checker, which can be born-off with an
+        # overshoot.
+        furthest_point:int = -1
+        if board_state == BEAR_OFF:
+            for point in (range(BLACK_HOME_BORDER, BLACK_HOME_POINT)
+                          if agent_id == BLACK_ID
+                          else range(WHITE_HOME_BORDER, WHITE_HOME_POINT, -1)):
+                if board[point] * sign > 0:
+                    furthest_point = point
+                    break
+
+        bears_off:tuple = MOVE_BEARS_OFF[agent_id]
+        overshoots:tuple = MOVE_OVERSHOOTS[agent_id]
+        for point in points:
+            if board[point] * sign <= 0:
+                continue
+            if bears_off[point][face]:
+                # Bear-off moves.
+                if board_state != BEAR_OFF:
+                    continue
+                if overshoots[point][face] and point != furthest_point:
+                    continue
+            to_point:int = destinations[point][face]
+            if board[to_point] * sign > -CHECKERS_BLOCKED:
+                moves.append((point, to_point, face))
+
+        return moves
+
+    def _expand_play_node(self, root:PlayNode,
+                          game_state:BackgammonState, move:tuple,
+                          faces:list[int], rank:tuple,
+                          best_rank:list[tuple]) -> None:
+        """_expand_play_node
+        Generates the play tree below a valid move, and adds it as a
+        child node unless every play sequence through it is outranked
+        by the best play sequence found so far.
 
         Args:
-            game_state (BackgammonState): Gamestate s.
-            move (tuple): Three tuple detailing fromPoint, toPoint, and
-            face value of a move.
-
-        Returns:
-            bool: True if valid, False otherwise.
+            root (PlayNode): Node to expand.
+            game_state (BackgammonState): BackgammonState reached at
+            the root node.
+            move (tuple): Three tuple of a valid move.
+            faces (list[int]): List of unused faces after the move.
+            rank (tuple): Number of moves and largest face played to
+            reach the root node.
+            best_rank (list[tuple]): Single element list storing the
+            best rank of a play sequence found so far.
         """
-        
-        (from_point, to_point, face) = move
-
-        if (game_state.current_agent_id == BLACK_ID):
-            # Move piece to home point.
-            if (to_point == BLACK_HOME_POINT and 
-                abs(to_point - from_point) == face):
-                return True
-            
-            # Move the furthest piece to home point with an overshoot.
-            elif (to_point == BLACK_HOME_POINT and
-                  abs(to_point - from_point) < face and
-                  game_state.black_checkers[0] == from_point):
-                return True
-            
-            # Determine if otherwise a valid normal state move. (e.g.
-            # with a face of two, move a checker from point 4 to
-            # point 2.)
-            else:
-                return self._evaluate_valid_move(game_state, move)
-
-        elif (game_state.current_agent_id == WHITE_ID):
-            # Move piece to home point.
-            if (to_point == WHITE_HOME_POINT and 
-                abs(to_point - from_point) == face):
-                return True
-            
-            # Move the furthest piece to home point with an overshoot.
-            elif (to_point == WHITE_HOME_POINT and
-                  abs(to_point - from_point) < face and
-                  game_state.white_checkers[0] == from_point):
-                return True
-            
-            # Determine if otherwise a valid normal state move. (e.g.
-            # with a face of two, move a checker from point 4 to
-            # point 2.)
-            else:
-                return self._evaluate_valid_move(game_state, move)
+        # Apply move to the shared game state.
+        undo_token:tuple = self.apply_move(game_state, move)
+        # Create a new search state node storing the move applied to get it there.
+        node_prime = PlayNode(root, None, move)
+        rank_prime:tuple = (rank[0] + 1, max(rank[1], move[2]))
+        min_source:int = self._get_min_source(game_state, move, faces)
+        # Recursive call on new search state node with unsused faces.
+        self._generate_play_tree(node_prime, game_state, faces,
+                                 rank_prime, best_rank, min_source)
+        if node_prime.children:
+            # Add new search state node to set of children.
+            root.children.append(node_prime)
+        elif rank_prime >= best_rank[0]:
+            # Store the resulting game state on leaf nodes that are not
+            # outranked.
+            best_rank[0] = rank_prime
+            node_prime.state = game_state.raw_clone()
+            root.children.append(node_prime)
+        # Restore the shared game state for the remaining siblings.
+        self.undo_move(game_state, undo_token)
 
     def _evaluate_board_state(self, game_state:BackgammonState) -> int:
         """_evaluate_board_state
@@ -495,23 +1077,22 @@ class BackgammonRules(GameRules):
             int: Class of board state
         """
 
-        if game_state.current_agent_id == BLACK_ID:
-            if game_state.black_checkers_taken >= 1:
+        board:array = game_state.board
+        if board[AGENT_INDEX] == BLACK_ID:
+            if board[BLACK_BAR_INDEX] >= 1:
                 # Taken black pieces on bar.
                 return ON_BAR
-            elif game_state.black_checkers[0] >= BLACK_HOME_BORDER:
+            elif max(board[WHITE_HOME_POINT:BLACK_HOME_BORDER]) <= 0:
                 # All black pieces in black home board.
-                assert (game_state.black_checkers_taken < 1)
                 return BEAR_OFF
             else:
                 return NORMAL
         else:
-            if game_state.white_checkers_taken >= 1:
+            if board[WHITE_BAR_INDEX] >= 1:
                 # Taken white pieces on bar.
                 return ON_BAR
-            elif game_state.white_checkers[0] <= WHITE_HOME_BORDER:
+            elif min(board[WHITE_HOME_BORDER + 1:NUM_POINTS]) >= 0:
                 # All white pieces in white home board.
-                assert (game_state.white_checkers_taken < 1)
                 return BEAR_OFF
             else:
                 return NORMAL
@@ -531,18 +1112,38 @@ class BackgammonRules(GameRules):
         Returns:
             GameState: GameState s'.
         """
+        game_state_prime:BackgammonState = self.generate_afterstate(
+            game_state, action, agent_id)
+
+        # Roll dice.
+        game_state_prime.roll()
+
+        return game_state_prime
+
+    def generate_afterstate(self, game_state:BackgammonState,
+                            action:list[tuple],
+                            agent_id:int) -> BackgammonState:
+        """generate_afterstate
+        Returns the afterstate for applying Action a on Agent agent_id
+        in GameState s, being the successive GameState s' before the
+        dice are rolled for the next agent.
+
+        Args:
+            game_state (GameState): GameState s.
+            action (list[tuple]): List of move tuples.
+            agent_id (int): Agent ID.
+
+        Returns:
+            GameState: Afterstate of GameState s.
+        """
         # Assert that action is being applied to the correct agent.
         assert(agent_id == game_state.current_agent_id)
 
-        game_state_prime:BackgammonState = deepcopy(game_state)
+        game_state_prime:BackgammonState = game_state.clone()
 
         # Update board state
         for move in action:
-            game_state_prime = self._update_game_state(game_state_prime,
-                                                       move)
-
-        # Roll dice.
-        game_state_prime.roll()
+            self.apply_move(game_state_prime, move)
 
         # Update game state id.
         if game_state.current_agent_id == BLACK_ID:
@@ -553,11 +1154,11 @@ class BackgammonRules(GameRules):
         return game_state_prime
 
     
-    def _update_game_state(self, game_state:BackgammonState,
-                           move:tuple) -> BackgammonState:
-        """_update_game_state
-        Returns an updated game state s' after applying move m in game
-        state s in place.
+    def apply_move(self, game_state:BackgammonState,
+                   move:tuple) -> tuple:
+        """apply_move
+        Applies move m to game state s in place, and returns an undo
+        token that restores s when passed to undo_move.
 
         Assumptions: The provided move is a valid move in the current
         board state.
@@ -567,79 +1168,114 @@ class BackgammonRules(GameRules):
             move (tuple): Three tuple of a valid move, m.
 
         Returns:
-            BackgammonState: BackgammonState, s'.
+            tuple: Undo token detailing fromPoint, toPoint, and whether
+            an opposing checker was taken.
         """
 
         (from_point, to_point, _) = move
+        board:array = game_state.board
+        hit:bool = False
 
-        if game_state.current_agent_id == BLACK_ID:
+        if board[AGENT_INDEX] == BLACK_ID:
             # Pick up checker.
             if from_point == WHITE_HOME_POINT:
-                game_state.black_checkers_taken -= 1
+                game_state.write(BLACK_BAR_INDEX,
+                                 board[BLACK_BAR_INDEX] - 1)
             else:
-                assert (game_state.points_content[from_point] > 0)
-                game_state.points_content[from_point] -= 1
-                if game_state.points_content[from_point] == 0:
-                    game_state.black_checkers.remove(from_point)
-            
+                assert (board[from_point] > 0)
+                game_state.write(from_point, board[from_point] - 1)
             
             # Put down checker.
-            assert (game_state.points_content[to_point] > -CHECKERS_BLOCKED)
-            if game_state.points_content[to_point] > 0:
-                # Existing point.
-                game_state.points_content[to_point] += 1
-            elif game_state.points_content[to_point] == 0:
-                # New point acquired.
-                game_state.points_content[to_point] = 1
-                game_state.black_checkers.append(to_point)
-                game_state.black_checkers.sort()
-            elif game_state.points_content[to_point] < 0:
+            assert (board[to_point] > -CHECKERS_BLOCKED)
+            if board[to_point] < 0:
                 # Take piece.
-                game_state.points_content[to_point] = 1
-                game_state.black_checkers.append(to_point)
-                game_state.black_checkers.sort()
-                game_state.white_checkers.remove(to_point)
-                game_state.white_checkers.sort(reverse=True)
-                game_state.white_checkers_taken += 1
+                hit = True
+                game_state.write(WHITE_BAR_INDEX,
+                                 board[WHITE_BAR_INDEX] + 1)
+                game_state.write(to_point, 1)
+            else:
+                game_state.write(to_point, board[to_point] + 1)
         
-        elif game_state.current_agent_id == WHITE_ID:
+        elif board[AGENT_INDEX] == WHITE_ID:
             # Pick up checker.
             if from_point == BLACK_HOME_POINT:
-                game_state.white_checkers_taken -= 1
+                game_state.write(WHITE_BAR_INDEX,
+                                 board[WHITE_BAR_INDEX] - 1)
             else:
-                assert (game_state.points_content[from_point] < 0)
-                game_state.points_content[from_point] += 1
-                if game_state.points_content[from_point] == 0:
-                    game_state.white_checkers.remove(from_point)
+                assert (board[from_point] < 0)
+                game_state.write(from_point, board[from_point] + 1)
 
             # Put down checker.
-            assert (game_state.points_content[to_point] < CHECKERS_BLOCKED)
-            if game_state.points_content[to_point] < 0:
-                # Existing point.
-                game_state.points_content[to_point] -= 1
-
-            elif game_state.points_content[to_point] == 0:
-                # New point acquired.
-                game_state.points_content[to_point] = -1
-                game_state.white_checkers.append(to_point)
-                game_state.white_checkers.sort(reverse=True) 
-
-            elif game_state.points_content[to_point] > 0:
+            assert (board[to_point] < CHECKERS_BLOCKED)
+            if board[to_point] > 0:
                 # Take piece.
-                game_state.points_content[to_point] = -1
-                game_state.white_checkers.append(to_point)
-                game_state.white_checkers.sort(reverse=True) 
-                game_state.black_checkers.remove(to_point)
-                game_state.black_checkers.sort()
-                game_state.black_checkers_taken += 1
-        
-        return game_state
+                hit = True
+                game_state.write(BLACK_BAR_INDEX,
+                                 board[BLACK_BAR_INDEX] + 1)
+                game_state.write(to_point, -1)
+            else:
+                game_state.write(to_point, board[to_point] - 1)
         
+        return (from_point, to_point, hit)
+
+    def undo_move(self, game_state:BackgammonState,
+                  undo_token:tuple) -> None:
+        """undo_move
+        Reverts the move that returned the undo token in game state s
+        in place, including returning a taken checker from the bar.
+
+        Assumptions: The undo token is from the last move applied to
+        game state s that has not been undone.
+
+        Args:
+            game_state (BackgammonState): BackgammonState, s.
+            undo_token (tuple): Undo token returned by apply_move.
+        """
+
+        (from_point, to_point, hit) = undo_token
+        board:array = game_state.board
+
+        if board[AGENT_INDEX] == BLACK_ID:
+            # Pick up checker.
+            if hit:
+                # Return taken piece.
+                game_state.write(to_point, -1)
+                game_state.write(WHITE_BAR_INDEX,
+                                 board[WHITE_BAR_INDEX] - 1)
+            else:
+                game_state.write(to_point, board[to_point] - 1)
+
+            # Put down checker.
+            if from_point == WHITE_HOME_POINT:
+                game_state.write(BLACK_BAR_INDEX,
+                                 board[BLACK_BAR_INDEX] + 1)
+            else:
+                game_state.write(from_point, board[from_point] + 1)
+
+        elif board[AGENT_INDEX] == WHITE_ID:
+            # Pick up checker.
+            if hit:
+                # Return taken piece.
+                game_state.write(to_point, 1)
+                game_state.write(BLACK_BAR_INDEX,
+                                 board[BLACK_BAR_INDEX] - 1)
+            else:
+                game_state.write(to_point, board[to_point] + 1)
+
+            # Put down checker.
+            if from_point == BLACK_HOME_POINT:
+                game_state.write(WHITE_BAR_INDEX,
+                                 board[WHITE_BAR_INDEX] + 1)
+            else:
+                game_state.write(from_point, board[from_point] - 1)
+
+        return None
 
     def calculate_score(self, game_state:BackgammonState,
                         agent_id:int) -> int:
         """calculate_score
-        Returns the pip score for agent ID in BackgammonState s.
+        Returns the pip score for agent ID in BackgammonState s, read
+        from the pip counts maintained by the state.
 
         Args:
             game_state (BackgammonState): BackgammonState s.
@@ -648,17 +1284,10 @@ class BackgammonRules(GameRules):
         Returns:
             int: Integer representing the agent's score.
         """
-        pip_score = 0
         if (agent_id == BLACK_ID):
-            for point in game_state.black_checkers:
-                pip_score += (game_state.points_content[point] *
-                              abs(BLACK_HOME_POINT - point))
-        elif (agent_id == WHITE_ID):
-            for point in game_state.white_checkers:
-                pip_score -= (game_state.points_content[point] *
-                              abs(WHITE_HOME_POINT - point))
-
-        return pip_score
+            return game_state.black_pips
+        else:
+            return game_state.white_pips
 
     def calculate_endgame_score(self, game_state:GameState,
                                 agent_id:int) -> int:
@@ -683,6 +1312,62 @@ class BackgammonRules(GameRules):
             # is bound to positive integers.
             return WINNING_SCORE
 
+    def encode_position(self, game_state:BackgammonState) -> bytes:
+        """encode_position
+        Returns the compact position ID of BackgammonState s.
+
+        Args:
+            game_state (BackgammonState): BackgammonState s.
+
+        Returns:
+            bytes: Position ID of POSITION_ID_SIZE bytes.
+        """
+        return game_state.position_id()
+
+    def decode_position(self, position_id:bytes,
+                        dice:list[int] = None) -> BackgammonState:
+        """decode_position
+        Returns the BackgammonState described by a position ID.
+
+        Args:
+            position_id (bytes): Position ID of POSITION_ID_SIZE bytes.
+            dice (list[int], optional): Dice of the state. Defaults to
+            None, rolling new dice.
+
+        Returns:
+            BackgammonState: BackgammonState s.
+        """
+        return BackgammonState.from_position_id(position_id, dice)
+
+    def encode_positions(self,
+                         game_states:list[BackgammonState]) -> np.ndarray:
+        """encode_positions
+        Returns the position IDs of a list of BackgammonStates.
+
+        Args:
+            game_states (list[BackgammonState]): BackgammonStates.
+
+        Returns:
+            np.ndarray: uint8 array of shape (N, POSITION_ID_SIZE).
+        """
+        return encode_position_ids(stack_state_buffers(game_states))
+
+    def decode_positions(self,
+                         position_ids:np.ndarray) -> list[BackgammonState]:
+        """decode_positions
+        Returns the BackgammonStates described by an array of position
+        IDs, each with newly rolled dice.
+
+        Args:
+            position_ids (np.ndarray): uint8 array of shape
+            (N, POSITION_ID_SIZE).
+
+        Returns:
+            list[BackgammonState]: BackgammonStates.
+        """
+        return [BackgammonState.from_position_id(position_id.tobytes())
+                for position_id in np.asarray(position_ids, dtype=np.uint8)]
+
     def game_ends(self, game_state:BackgammonState) -> bool:
         """game_ends
         Returns whether the game ends in BackgammonState.
@@ -693,16 +1378,12 @@ class BackgammonRules(GameRules):
         Returns:
             bool: Boolean indicating the completion of the game.
         """
-        if (len(game_state.black_checkers) == 1 and
-            game_state.black_checkers[0] == BLACK_HOME_POINT and
-            game_state.black_checkers_taken == 0):
+        if game_state.board[BLACK_HOME_POINT] == NUM_CHECKERS:
             # Black has moved all pieces to its home position.
             return True
-        elif (len(game_state.white_checkers) == 1 and
-                game_state.white_checkers[0] == WHITE_HOME_POINT and
-                game_state.white_checkers_taken == 0):
-                # White has moved all pieces to its home position.
-                return True
+        elif game_state.board[WHITE_HOME_POINT] == -NUM_CHECKERS:
+            # White has moved all pieces to its home position.
+            return True
         else:
             return False
 
@@ -716,6 +1397,9 @@ def generate_td_gammon_vector(game_state:BackgammonState) -> np.array:
     Turn a BackgammonState object into a vector representation used in
     the TD-gammon technique outlined in Tesaruo's paper.
 
+    The vector is a read-only view of the feature buffer maintained by
+    the state, so should be copied if the state is later modified.
+
     Reference List:
         Tesauro, G. (1995). Temporal difference learning and TD-Gammon.
         Communications of the ACM, 38(3), 58-68.
@@ -726,50 +1410,142 @@ def generate_td_gammon_vector(game_state:BackgammonState) -> np.array:
     Returns:
         np.array: Vector representation of game state.
     """
+    return np.frombuffer(memoryview(game_state.features).toreadonly(),
+                         dtype=np.float32)
 
-    # Determine agent vectors.
-    black_vector:list[float] = []
-    white_vector:list[float] = []
-    blank_vector:list[float] = [0] * 4
-    for i in range(1, 25):
-        point = game_state.points_content[i]
-        if point > 0:
-            # Black owned point.
-            if point < 4:
-                point_vec:list[float] = [1 for x in range(point)] + [0 for x in range(abs(point-4))]
-            else:
-                point_vec:list[float] = [1,1,1, ((point-3)/2)]
-
-            black_vector += point_vec
-            white_vector += blank_vector
-        elif point < 0:
-            # White owned point.
-            if point > -4:
-                point_vec:list[float] = [1 for x in range(abs(point))] + [0 for x in range(abs(abs(point)-4))]
-            else:
-                point_vec:list[float] = [1,1,1, ((abs(point)-3)/2)]
+def generate_td_gammon_matrix(
+        game_states:list[BackgammonState]) -> np.ndarray:
+    """generate_td_gammon_matrix
+    Stacks the TD-gammon vectors of a list of BackgammonStates into a
+    feature matrix.
+
+    Args:
+        game_states (list[BackgammonState]): BackgammonStates.
+
+    Returns:
+        np.ndarray: float32 array of shape (N, NUM_TD_GAMMON_FEATURES).
+    """
+    return np.frombuffer(
+        b"".join([game_state.features.tobytes()
+                  for game_state in game_states]),
+        dtype=np.float32).reshape(-1, NUM_TD_GAMMON_FEATURES)
+
+def encode_td_gammon_boards(boards:np.ndarray) -> np.ndarray:
+    """encode_td_gammon_boards
+    Encodes an array of state buffers into the TD-gammon feature matrix,
+    matching generate_td_gammon_vector for each row.
+
+    Args:
+        boards (np.ndarray): Integer array of shape (N, >= DICE_INDEX),
+        laid out as the BackgammonState buffer, i.e. the 26 points
+        (including the home points) followed by the bar and agent to
+        move columns.
+
+    Returns:
+        np.ndarray: float32 array of shape (N, NUM_TD_GAMMON_FEATURES).
+    """
+    boards = np.asarray(boards)
+    points:np.ndarray = boards[:, WHITE_HOME_POINT + 1:BLACK_HOME_POINT]
+    num_boards:int = len(boards)
+    features:np.ndarray = np.empty((num_boards, NUM_TD_GAMMON_FEATURES),
+                                   dtype=np.float32)
+
+    # Look up the four features of each point for both agents.
+    features[:, :TD_GAMMON_WHITE_OFFSET] = TD_GAMMON_POINT_TABLE[
+        np.maximum(points, 0)].reshape(num_boards, -1)
+    features[:, TD_GAMMON_WHITE_OFFSET:TD_GAMMON_BAR_OFFSET] = (
+        TD_GAMMON_POINT_TABLE[np.maximum(-points, 0)]
+        .reshape(num_boards, -1))
 
-            white_vector += point_vec
-            black_vector += blank_vector
-        else:
-            # Empty point.
-            black_vector += blank_vector
-            white_vector += blank_vector
-    
-    vector:list[float] = black_vector + white_vector
-    
     # Pieces on bar.
-    vector.append((game_state.black_checkers_taken / 2))
-    vector.append((game_state.white_checkers_taken / 2))
+    features[:, TD_GAMMON_BAR_OFFSET] = boards[:, BLACK_BAR_INDEX] / 2
+    features[:, TD_GAMMON_BAR_OFFSET + 1] = boards[:, WHITE_BAR_INDEX] / 2
 
     # Pieces removed.
-    vector.append(abs(game_state.points_content[BLACK_HOME_POINT]) / 2)
-    vector.append(abs(game_state.points_content[WHITE_HOME_POINT]) / 2)
+    features[:, TD_GAMMON_OFF_OFFSET] = np.abs(boards[:, BLACK_HOME_POINT]) / 2
+    features[:, TD_GAMMON_OFF_OFFSET + 1] = (
+        np.abs(boards[:, WHITE_HOME_POINT]) / 2)
 
     # Agents turn.
-    vector.append((1 if game_state.current_agent_id == BLACK_ID else 0))
-    vector.append((1 if game_state.current_agent_id == WHITE_ID else 0))
+    features[:, TD_GAMMON_TURN_OFFSET] = boards[:, AGENT_INDEX] == BLACK_ID
+    features[:, TD_GAMMON_TURN_OFFSET + 1] = boards[:, AGENT_INDEX] == WHITE_ID
+
+    return features
 
-    return np.array(vector, dtype="f")
+def stack_state_buffers(game_states:list[BackgammonState]) -> np.ndarray:
+    """stack_state_buffers
+    Stacks the state buffers of a list of BackgammonStates into an
+    array.
+
+    Args:
+        game_states (list[BackgammonState]): BackgammonStates.
+
+    Returns:
+        np.ndarray: int8 array of shape (N, STATE_BUFFER_SIZE).
+    """
+    return np.frombuffer(
+        b"".join([game_state.board.tobytes() for game_state in game_states]),
+        dtype=np.int8).reshape(-1, STATE_BUFFER_SIZE)
+
+def encode_position_ids(boards:np.ndarray) -> np.ndarray:
+    """encode_position_ids
+    Encodes an array of state buffers into position IDs, matching
+    BackgammonState.position_id.
+
+    Args:
+        boards (np.ndarray): int8 array of shape (N, >= DICE_INDEX),
+        laid out as the BackgammonState buffer.
+
+    Returns:
+        np.ndarray: uint8 array of shape (N, POSITION_ID_SIZE).
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    counts:np.ndarray = np.maximum(
+        boards[:, POSITION_ID_INDICES].astype(np.int64) * POSITION_ID_SIGNS, 0)
+
+    # Set the run of ones up to the last zero, then clear the zeros
+    # closing each point.
+    separators:np.ndarray = np.cumsum(counts + 1, axis=1) - 1
+    bits:np.ndarray = np.arange(POSITION_ID_BITS) < separators[:, -1:]
+    np.put_along_axis(bits, separators, False, axis=1)
+
+    return np.concatenate(
+        (np.packbits(bits, axis=1, bitorder="little"),
+         boards[:, AGENT_INDEX:AGENT_INDEX + 1].astype(np.uint8)), axis=1)
+
+def decode_position_ids(position_ids:np.ndarray) -> np.ndarray:
+    """decode_position_ids
+    Decodes an array of position IDs into state buffers, matching
+    BackgammonState.from_position_id.
+
+    Args:
+        position_ids (np.ndarray): uint8 array of shape
+        (N, POSITION_ID_SIZE).
+
+    Returns:
+        np.ndarray: int8 array of shape (N, DICE_INDEX), laid out as the
+        BackgammonState buffer without the dice.
+    """
+    position_ids = np.asarray(position_ids, dtype=np.uint8)
+    bits:np.ndarray = np.unpackbits(
+        position_ids[:, :POSITION_ID_BITS // 8], axis=1, bitorder="little")
+
+    # With at most 30 ones, the first zeros are those closing each point.
+    separators:np.ndarray = np.argsort(
+        bits, axis=1, kind="stable")[:, :len(POSITION_ID_INDICES)]
+    counts:np.ndarray = np.diff(separators, axis=1, prepend=-1) - 1
+
+    num_points:int = len(POSITION_ID_POINTS[BLACK_ID])
+    boards:np.ndarray = np.zeros((len(position_ids), DICE_INDEX),
+                                 dtype=np.int8)
+    # Each point is held by at most one agent.
+    np.add.at(boards, (slice(None), POSITION_ID_INDICES),
+              counts * POSITION_ID_SIGNS)
+    boards[:, BLACK_HOME_POINT] = (NUM_CHECKERS
+                                   - counts[:, :num_points].sum(axis=1))
+    boards[:, WHITE_HOME_POINT] = -(NUM_CHECKERS
+                                    - counts[:, num_points:].sum(axis=1))
+    boards[:, AGENT_INDEX] = position_ids[:, -1]
+    return boards
 
 # END ---------------------------------------------------------------- #
\ No newline at end of file
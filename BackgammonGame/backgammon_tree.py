@@ -17,6 +17,17 @@ class PlayNode():
     next_node_id = 0
 
     def __init__(self, parent, state, move:tuple = None) -> None:
+        """__init__
+        Initialise an instance of PlayNode class.
+
+        Args:
+            parent (PlayNode): Parent node, None for the root node.
+            state (BackgammonState): Game state stored at the node. The
+            play tree is generated on a single mutable game state, so
+            this is only set on the root and leaf nodes.
+            move (tuple, optional): Move applied to reach the node.
+            Defaults to None.
+        """
         
         # Assign node an ID.
         self.id = PlayNode.next_node_id
@@ -0,0 +1,180 @@
+# INFORMATION -------------------------------------------------------- #
+
+# Author:  Josh Vaughan
+# Date:    18/10/2026
+# Purpose: Implements a playout engine that plays complete Backgammon
+#          games between policies, without the copying, timing and
+#          history of ExtendedFormGame.Game, for rollouts and baseline
+#          evaluation.
+
+# IMPORTS ------------------------------------------------------------ #
+
+from typing import Callable
+import random
+
+from Agents.heuristic.running import select_running_action
+from BackgammonGame.backgammon_model import BLACK_ID, WHITE_ID, WINNING_SCORE, BackgammonRules, BackgammonState
+from ExtendedFormGame.template import Action, Agent
+
+# CONSTANTS ---------------------------------------------------------- #
+
+# Policies return the action to play for the agent in a game state.
+Policy = Callable[[BackgammonState, int], Action]
+# Turn limit guarding against policies that never complete a game.
+MAX_PLAYOUT_TURNS:int = 10000
+
+# FUNC DEF ----------------------------------------------------------- #
+
+def playout(game_rules:BackgammonRules, policies:list[Policy],
+            game_state:BackgammonState = None,
+            record_trajectory:bool = False,
+            max_turns:int = MAX_PLAYOUT_TURNS) -> dict:
+    """playout
+    Plays a game to the end between policies, applying each action in
+    place on a single game state. Policies are passed the live game
+    state, so they must not modify it without restoring it.
+
+    Args:
+        game_rules (BackgammonRules): Rules of the game.
+        policies (list[Policy]): Policy of each agent, indexed by Agent
+        ID.
+        game_state (BackgammonState, optional): State to play from,
+        which is not modified. Defaults to None, for the initial state.
+        record_trajectory (bool, optional): Record the position ID of
+        the state at the start of the game and after each turn.
+        Defaults to False.
+        max_turns (int, optional): Number of turns after which the game
+        is abandoned. Defaults to MAX_PLAYOUT_TURNS.
+
+    Returns:
+        dict: Dictionary of the "winner" Agent ID (None if the game was
+        abandoned), the "scores" of each agent as in the history of
+        ExtendedFormGame.Game, the number of "turns", and the
+        "trajectory" of position IDs if recorded.
+    """
+    if game_state is None:
+        game_state = game_rules.initial_game_state()
+    else:
+        game_state = game_state.clone()
+    trajectory:list[bytes] = None
+    if record_trajectory:
+        trajectory = [game_rules.encode_position(game_state)]
+
+    # Play turns until the game ends.
+    turns:int = 0
+    while not game_rules.game_ends(game_state) and turns < max_turns:
+        agent_id:int = game_state.current_agent_id
+        play_turn(game_rules, game_state,
+                  policies[agent_id](game_state, agent_id))
+
+        turns += 1
+        if trajectory is not None:
+            trajectory.append(game_rules.encode_position(game_state))
+
+    # Determine the result of the game.
+    result:dict = {"winner":None, "scores":[0] * game_rules.num_agents,
+                   "turns":turns}
+    if game_rules.game_ends(game_state):
+        for i in range(game_rules.num_agents):
+            result["scores"][i] = game_rules.calculate_endgame_score(
+                game_state, i)
+            if result["scores"][i] == WINNING_SCORE:
+                result["winner"] = i
+    if trajectory is not None:
+        result["trajectory"] = trajectory
+
+    return result
+
+def play_turn(game_rules:BackgammonRules, game_state:BackgammonState,
+              action:Action) -> None:
+    """play_turn
+    Applies action a for the current agent to game state s in place,
+    passing the turn to the next agent and rolling the dice, as
+    BackgammonRules.generate_successor does on a copy.
+
+    Args:
+        game_rules (BackgammonRules): Rules of the game.
+        game_state (BackgammonState): Game state s, updated in place.
+        action (Action): Action a.
+    """
+    # Update board state, game state id and dice in place.
+    for move in action:
+        game_rules.apply_move(game_state, move)
+    game_state.current_agent_id = (WHITE_ID
+                                   if game_state.current_agent_id == BLACK_ID
+                                   else BLACK_ID)
+    game_state.roll()
+
+def run_playouts(game_rules:BackgammonRules, policies:list[Policy],
+                 num_games:int, seed:int = None,
+                 record_trajectory:bool = False) -> list[dict]:
+    """run_playouts
+    Plays a number of games from the initial state between policies.
+
+    Args:
+        game_rules (BackgammonRules): Rules of the game.
+        policies (list[Policy]): Policy of each agent, indexed by Agent
+        ID.
+        num_games (int): Number of games.
+        seed (int, optional): Random seed. Defaults to None, leaving
+        the random library unseeded.
+        record_trajectory (bool, optional): Record the position IDs of
+        each game. Defaults to False.
+
+    Returns:
+        list[dict]: Result of each game, as returned by playout.
+    """
+    if seed is not None:
+        random.seed(seed)
+    return [playout(game_rules, policies,
+                    record_trajectory=record_trajectory)
+            for _ in range(num_games)]
+
+def random_policy(game_rules:BackgammonRules) -> Policy:
+    """random_policy
+    Returns a policy playing a random legal action, drawn by
+    BackgammonRules.get_random_action.
+
+    Args:
+        game_rules (BackgammonRules): Rules of the game.
+
+    Returns:
+        Policy: Random policy.
+    """
+    return game_rules.get_random_action
+
+def running_policy(game_rules:BackgammonRules) -> Policy:
+    """running_policy
+    Returns a policy playing the action selected by the running
+    heuristic agent, with Agents.heuristic.running.select_running_action.
+
+    Args:
+        game_rules (BackgammonRules): Rules of the game.
+
+    Returns:
+        Policy: Running policy.
+    """
+    def policy(game_state:BackgammonState, agent_id:int) -> Action:
+        return select_running_action(game_rules, game_state, agent_id)
+    return policy
+
+def agent_policy(game_rules:BackgammonRules, agent:Agent) -> Policy:
+    """agent_policy
+    Returns a policy selecting actions with an Agent instance, which is
+    passed a copy of the game state and the legal actions, as in
+    ExtendedFormGame.Game, but without a time limit.
+
+    Args:
+        game_rules (BackgammonRules): Rules of the game.
+        agent (Agent): Agent instance.
+
+    Returns:
+        Policy: Policy of the agent.
+    """
+    def policy(game_state:BackgammonState, agent_id:int) -> Action:
+        return agent.select_action(game_state.clone(),
+                                   game_rules.get_legal_actions(game_state,
+                                                                agent_id))
+    return policy
+
+# END FILE ----------------------------------------------------------- #
@@ -17,6 +17,7 @@ from ExtendedFormGame.template import Agent, GameRules, GameState
 
 WARMUP:int = 100000 # Warm-up period for each agent on their first turn.
 TIME_LIMIT:int = 100000
+WARNING_LIMIT:int = 3
 WINNING_PIP_VALUE:int = 0
 
 # CLASS DEF ---------------------------------------------------------- #
@@ -26,7 +27,7 @@ class Game():
     def __init__(self, game_rules:GameRules, agent_list:Agent,
                  agent_names:list[str], num_agents:int,
                  seed:int = 1, time_limit:int = TIME_LIMIT,
-                 warning_limit:int = 3) -> None:
+                 warning_limit:int = WARNING_LIMIT) -> None:
         """__init__
         Initialise an instance of Game class.
 
@@ -81,7 +82,7 @@ class Game():
             game_state:GameState = self.game_rule.current_game_state
             actions:tuple = self.game_rule.get_legal_actions(game_state,
                                                              self.game_rule.current_agent_id)
-            gs_copy:GameState = deepcopy(game_state)
+            gs_copy:GameState = game_state.clone()
             actions_copy:tuple = deepcopy(actions)            
 
             # Agent selects action.
@@ -7,6 +7,7 @@
 
 # IMPORTS ------------------------------------------------------------ #
 
+from copy import deepcopy
 from . import utils
 import random
 
@@ -16,9 +17,21 @@ import random
 # CLASS DEF ---------------------------------------------------------- #
 
 class GameState():
+    __slots__ = ()
+
     def __init__(self, num_agents: int, agent_id: int) -> None:
         pass
 
+    def clone(self):
+        """clone
+        Returns a copy of the GameState. Subclasses should override
+        this with a cheaper copy of their representation.
+
+        Returns:
+            GameState: Copy of GameState s.
+        """
+        return deepcopy(self)
+
 class Action():
     pass
 
@@ -89,6 +102,22 @@ class GameRules:
         utils.raiseNotDefined()
         return []
 
+    def get_random_action(self, game_state:GameState,
+                          agent_id:int) -> Action:
+        """get_random_action
+        Returns a random Action instance that is legal for Agent ID in
+        a given GameState. Games can override this to sample an action
+        without generating every legal action.
+
+        Args:
+            game_state (GameState): GameState s.
+            agent_id (int): Agent ID.
+
+        Returns:
+            Action: Action instance that is valid in GameState s.
+        """
+        return random.choice(self.get_legal_actions(game_state, agent_id))
+
     def calculate_score(self, game_state:GameState,
                         agent_id:int) -> int:
         """calculate_score
@@ -7,6 +7,7 @@
 
 # IMPORTS ------------------------------------------------------------ #
 
+from collections import OrderedDict
 import inspect
 import sys
 
@@ -23,4 +24,82 @@ def raiseNotDefined():
     print("*** Method not implemented: %s at line %s of %s" % (method, line, fileName))
     sys.exit(1)      
 
+class LRUCache():
+
+    def __init__(self, capacity:int) -> None:
+        """__init__
+        Initialise a bounded cache, evicting the least recently used
+        entry once capacity is reached, and counting hits and misses.
+
+        Args:
+            capacity (int): Maximum number of entries.
+        """
+        assert (capacity > 0)
+        self.capacity:int = capacity
+        self.entries:OrderedDict = OrderedDict()
+        self.hits:int = 0
+        self.misses:int = 0
+        self.evictions:int = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        """get
+        Returns the value for a key, marking it as most recently used.
+
+        Args:
+            key (Hashable): Key.
+            default (optional): Value returned on a miss. Defaults to
+            None.
+
+        Returns:
+            Value for the key, or the default.
+        """
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value) -> None:
+        """put
+        Stores the value for a key, evicting the least recently used
+        entry if the cache is full.
+
+        Args:
+            key (Hashable): Key.
+            value: Value.
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """clear
+        Removes all entries, keeping the counters.
+        """
+        self.entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups:int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """stats
+        Returns the counters of the cache.
+
+        Returns:
+            dict: Size, capacity, hits, misses, evictions and hit rate.
+        """
+        return {"size": len(self.entries), "capacity": self.capacity,
+                "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hit_rate}
+
 # END ---------------------------------------------------------------- #
\ No newline at end of file
@@ -8,18 +8,21 @@
 # IMPORTS ------------------------------------------------------------ #
 
 import argparse
+import queue
 from pathlib import PurePosixPath, PureWindowsPath
 import sys
 import traceback
 from importlib import import_module
-from Agents.rl.tdgammon.TDGammonNN import TDGammonNNQFunction
 from Agents.rl.tdgammon.inference import myAgent as InferenceAgent
+from Agents.rl.tdgammon.TDGammonNumpy import get_numpy_policy_path, load_numpy_qfunction
+from Agents.rl.tdgammon.TDGammonLockstep import run_lockstep_games
 from ExtendedFormGame.template import Agent
 from BackgammonGame.backgammon_model import BLACK_ID, WHITE_ID, BackgammonRules
 from ExtendedFormGame.Game import Game
+from BackgammonGame.playout import agent_policy
 from Agents.generic.random import myAgent as RandomAgent
-from Agents.rl.tdgammon.TDGammon0_0 import myAgent as TDGAgent
 from datetime import datetime, timedelta
+from multiprocessing import Pool
 import random
 import re
 
@@ -33,6 +36,12 @@ BASE_DURATION:int = 1 # Duration of training in hours.
 AGENTS_MODULE_PATH:str = "Agents."
 RESULTS_PATH:PureWindowsPath = PureWindowsPath("results", "train")
 JSON_INDENT:int = 4 # One tab
+WORKER_RESULT_TIMEOUT:float = 1.0 # Seconds between checking the duration.
+TORCH_BACKEND:str = "torch"
+NUMPY_BACKEND:str = "numpy"
+
+# Agents of an evaluation worker process, set by init_eval_worker.
+eval_worker:dict = dict()
 
 # FUNC DEF ----------------------------------------------------------- #
 
@@ -56,6 +65,12 @@ def load_parameters():
     parser.add_argument('-a','--agents', help='A list of the agents, etc, agents.myteam.player', default="generic.random,generic.random", dest="agents")
     parser.add_argument('--agent_names', help='A list of agent names', default="random0,random1", dest="agent_names") 
     parser.add_argument("-m", "--models", help="A list of paths to agent models.", dest="models")
+    parser.add_argument("--cache_capacity", type=int, help="Number of position evaluations cached by each evaluated model, where 0 disables the cache. (default: 0)", default=0, dest="cache_capacity")
+    parser.add_argument("--workers", type=int, help="Number of worker processes playing episodes. In evaluation, each episode has a seed derived from --set_seed, so results do not depend on the number of workers, and this cannot be combined with --lockstep. In training, workers require self-play between TD-Gammon agents, and update shared weights without locks. (default: 1)", default=1, dest="workers")
+    parser.add_argument("--actor_learner", action='store_true', help="Boolean indicator of whether self-play training of TD-Gammon agents uses --workers actor processes playing games with published weights, and a single learner updating the weights from batches of their games. (default: False)", default=False, dest="actor_learner")
+    parser.add_argument("--learner_batch", type=int, help="Maximum number of games in each update of the learner with --actor_learner. (default: LEARNER_BATCH_SIZE of TDGammonActorLearner)", default=None, dest="learner_batch")
+    parser.add_argument("--lockstep", type=int, help="Number of evaluation games played in lockstep, batching the evaluation of models across games, where 0 plays one game at a time. Each game is seeded as in serial evaluation and with --workers, so the same games are played regardless of the number of games in lockstep. (default: 0)", default=0, dest="lockstep")
+    parser.add_argument("--backend", choices=[TORCH_BACKEND, NUMPY_BACKEND], help="Inference backend for evaluated models, where numpy exports .pt models to .npz and does not require PyTorch for .npz models. The backends agree to float32 rounding, and values within a few float32 ulps of the best are ties broken at random, but the backends may still select different moves between genuine near-ties. (default: torch)", default=TORCH_BACKEND, dest="backend")
 
     # Game settings.
     parser.add_argument('-w', '--warningTimeLimit', type=float,help='Time limit for a warning of one move in seconds (default: 1)', default=1.0, dest="wtl")
@@ -63,7 +78,10 @@ def load_parameters():
     parser.add_argument('--set_seed', type=int,help='Set the random seed, otherwise it will be completely random (default: 42)', default=SEED, dest="set_seed")
     parser.add_argument("-r", "--results", help="Path to store results for the runtime. (Default: 'Results')", default=RESULTS_PATH, dest="results")
     # Read args from command line
-    return parser.parse_args(sys.argv[1:])
+    options = parser.parse_args(sys.argv[1:])
+    if options.lockstep > 0 and options.workers > 1:
+        parser.error("--lockstep cannot be combined with --workers")
+    return options
 
 def load_agent(agent_path:list,
                module_path:str = AGENTS_MODULE_PATH) -> tuple[list[Agent], bool]:
@@ -109,7 +127,10 @@ def load_agent(agent_path:list,
 def train(agent_path:list[str], agent_names:list[str],
           results_path: str, training_name:str, seed:int = SEED,
           max_episodes:int = BASE_EPISODES,
-          max_duration:int = BASE_DURATION) -> bool:
+          max_duration:int = BASE_DURATION,
+          workers:int = 1,
+          actor_learner:bool = False,
+          learner_batch:int = None) -> bool:
     """train
     A script to control the training of a agent playing backgammon.
 
@@ -123,6 +144,15 @@ def train(agent_path:list[str], agent_names:list[str],
         Defaults to BASE_EPISODES.
         max_duration (int, optional): Duration to train for. Defaults
         to BASE_DURATION.
+        workers (int, optional): Number of worker processes playing
+        self-play episodes between TD-Gammon agents. Defaults to 1,
+        playing episodes in this process.
+        actor_learner (bool, optional): Whether the workers are actors
+        playing with published weights, with this process learning from
+        their games, rather than updating shared weights. Defaults to
+        False.
+        learner_batch (int, optional): Maximum number of games in each
+        update of the learner. Defaults to None, for LEARNER_BATCH_SIZE.
 
     Returns:
         bool: Success indicator of training.
@@ -137,15 +167,19 @@ def train(agent_path:list[str], agent_names:list[str],
     # Initialise matches dictionary.
     matches:dict = initialise_results(agent_path, agent_names, seed)
 
+    # NOTE: Imported here so that evaluation does not import PyTorch.
+    from Agents.rl.tdgammon.TDGammon0_0 import myAgent as TDGAgent
+
     # Create agents.
     time_print("Creating agents...")
     assert(len(agent_path) == 2)
     num_agents = 2
     (agent_list, valid_game) = load_agent(agent_path)
     # Self-play game between TD Agents.
-    if (agent_path[BLACK_ID] == agent_path[WHITE_ID]
-        and type(agent_list[BLACK_ID]) is TDGAgent
-        and type(agent_list[WHITE_ID]) is TDGAgent):
+    self_play:bool = (agent_path[BLACK_ID] == agent_path[WHITE_ID]
+                      and type(agent_list[BLACK_ID]) is TDGAgent
+                      and type(agent_list[WHITE_ID]) is TDGAgent)
+    if self_play:
         # Both agents reference the same Q-Function.
         agent_list[WHITE_ID].qfunction = agent_list[BLACK_ID].qfunction
         assert(id(agent_list[WHITE_ID].qfunction) == id(agent_list[BLACK_ID].qfunction))
@@ -153,6 +187,89 @@ def train(agent_path:list[str], agent_names:list[str],
     if not valid_game:
         # TECH DEBT: Should I throw some kind of log from here?
         return False
+    if workers > 1 and not self_play:
+        print('Error: --workers requires self-play between TD-Gammon agents!', file=sys.stderr)
+        return False
+
+    if self_play and actor_learner:
+        # Actor processes play episodes with the published weights,
+        # while this process learns from batches of their games,
+        # publishes the weights, and checkpoints the results and the
+        # weights.
+        from Agents.rl.tdgammon.TDGammonActorLearner import LEARNER_BATCH_SIZE, WeightSnapshot, start_actors, stop_actors, get_trajectory_batch
+        if learner_batch is None:
+            learner_batch = LEARNER_BATCH_SIZE
+        qfunction = agent_list[BLACK_ID].qfunction
+        snapshot = WeightSnapshot(qfunction.nn)
+        (processes, trajectories, stop) = start_actors(
+            snapshot, qfunction.nn.hidden[0].out_features, seed, workers)
+        while (datetime.now() < finish_time and episode < max_episodes):
+            try:
+                batch:list[tuple] = get_trajectory_batch(
+                    trajectories, min(learner_batch, max_episodes - episode),
+                    WORKER_RESULT_TIMEOUT)
+            except queue.Empty:
+                continue
+
+            # Update and publish the weights.
+            qfunction.update_trajectories([game[3] for game in batch],
+                                          [game[4] for game in batch],
+                                          agent_list[BLACK_ID].mdp.gamma)
+            snapshot.publish(qfunction.nn)
+
+            for (actor_id, version, tmp_seed, _, scores, elapsed) in batch:
+                # Increment training variables.
+                episode += 1
+                time_print(f"Actor {actor_id} completed episode {episode} with weights version {version}, elapsed episode time {elapsed}")
+
+                # Checkpoint results
+                matches = checkpoint_results(matches, {"scores":scores},
+                                             results_path, file_time,
+                                             training_name, tmp_seed,
+                                             episode, elapsed)
+
+            # Checkpoint training weights, shared by both agents.
+            filepath:PureWindowsPath = PureWindowsPath(file_time+"_"+training_name)
+            agent_list[BLACK_ID].save_weights(str(PurePosixPath(filepath)))
+        stop_actors(processes, trajectories, stop)
+    elif self_play and workers > 1:
+        # Play episodes in worker processes, which update the weights in
+        # shared memory, while this process checkpoints the results and
+        # the weights.
+        from Agents.rl.tdgammon.TDGammonHogwild import start_hogwild_workers, stop_hogwild_workers
+        flat_params = agent_list[BLACK_ID].qfunction.nn.share_params()
+        (processes, worker_results, stop) = start_hogwild_workers(
+            flat_params, agent_path, seed, workers)
+        while (datetime.now() < finish_time and episode < max_episodes):
+            try:
+                (worker_id, tmp_seed, history, elapsed) = worker_results.get(
+                    timeout=WORKER_RESULT_TIMEOUT)
+            except queue.Empty:
+                continue
+
+            # Increment training variables.
+            episode += 1
+            time_print(f"Worker {worker_id} completed episode {episode}, elapsed episode time {elapsed}")
+
+            # Checkpoint results
+            matches = checkpoint_results(matches, history, results_path,
+                                         file_time, training_name,
+                                         tmp_seed, episode, elapsed)
+
+            # Checkpoint the shared training weights, without the
+            # eligibility traces of this process, which does not train.
+            filepath:PureWindowsPath = PureWindowsPath(file_time+"_"+training_name)
+            agent_list[BLACK_ID].save_weights(str(PurePosixPath(filepath)),
+                                              save_traces=False)
+        num_discarded:int = stop_hogwild_workers(processes, worker_results,
+                                                 stop)
+
+        # Workers update the weights until they stop, so checkpoint the
+        # weights with the updates of the discarded episodes.
+        time_print(f"Workers trained {episode + num_discarded} episodes, of which {num_discarded} completed after the last checkpoint")
+        filepath:PureWindowsPath = PureWindowsPath(file_time+"_"+training_name)
+        agent_list[BLACK_ID].save_weights(str(PurePosixPath(filepath)),
+                                          save_traces=False)
 
     while (datetime.now() < finish_time and episode < max_episodes):
         time_print(f"Starting episode {episode}...")
@@ -206,7 +323,11 @@ def eval(agent_path:list[str], agent_names:list[str],
          model_path:list[str], results_path: str,
          eval_name:str, seed:int = SEED,
          max_episodes:int = BASE_EPISODES,
-         max_duration:int = BASE_DURATION) -> bool:
+         max_duration:int = BASE_DURATION,
+         backend:str = TORCH_BACKEND,
+         cache_capacity:int = 0,
+         lockstep:int = 0,
+         workers:int = 1) -> bool:
     """eval
     A script to control the evaluation of an agent playing backgammon.
 
@@ -221,6 +342,15 @@ def eval(agent_path:list[str], agent_names:list[str],
         Defaults to BASE_EPISODES.
         max_duration (int, optional): Duration to evaluate for. Defaults
         to BASE_DURATION.
+        backend (str, optional): Inference backend for models. Defaults
+        to TORCH_BACKEND.
+        cache_capacity (int, optional): Number of position evaluations
+        cached by each model. Defaults to 0, disabling the cache.
+        lockstep (int, optional): Number of games played in lockstep.
+        Defaults to 0, playing one game at a time.
+        workers (int, optional): Number of worker processes playing
+        episodes, when not playing in lockstep. Defaults to 1, playing
+        episodes in this process.
 
     Returns:
         bool: Success indicator of evaluation.
@@ -232,6 +362,10 @@ def eval(agent_path:list[str], agent_names:list[str],
     file_time:datetime = current_time.strftime("%Y%m%d-%H%M")
     random.seed(seed)
 
+    # Derive the seed of every episode up front, so each episode can be
+    # played independently of the episodes before it.
+    episode_seeds:list[float] = [random.random() for _ in range(max_episodes)]
+
     # Initialise matches dictionary.
     matches:dict = initialise_results(agent_path, agent_names, seed)
 
@@ -246,35 +380,69 @@ def eval(agent_path:list[str], agent_names:list[str],
         return False
     
     # Load models for evaluation.
-    for i in range(num_agents):
-        if type(agent_list[i]) is InferenceAgent:
-            # TD Gammon NN Qfunction provided.
-            if re.search(r"(Agents/rl/tdgammon/trained_models/)(.*)", model_path[i]):
-                agent_list[i].qfunction = TDGammonNNQFunction()
-                agent_list[i].qfunction.load_policy(model_path[i])
-            else:
-                return False
+    if not load_models(agent_list, model_path, backend, cache_capacity):
+        return False
+
+    if lockstep > 0:
+        # Play games in lockstep, where models evaluate the afterstates
+        # of every game in a single batch, and other agents play their
+        # policy without the Game harness.
+        bg_rules = BackgammonRules()
+        qfunctions:list = [agent.qfunction if type(agent) is InferenceAgent
+                           else None for agent in agent_list]
+        policies:list = [None if type(agent) is InferenceAgent
+                         else agent_policy(bg_rules, agent)
+                         for agent in agent_list]
+        for game, history, elapsed in run_lockstep_games(
+                bg_rules, qfunctions, policies, episode_seeds, agent_path,
+                lockstep):
+            episode += 1
+            time_print(f"Completed episode {episode}, elapsed episode time {elapsed}")
+
+            # Checkpoint results
+            matches = checkpoint_results(matches, history, results_path,
+                                         file_time, eval_name,
+                                         episode_seeds[game], episode,
+                                         elapsed)
+            if datetime.now() >= finish_time:
+                break
+    elif workers > 1:
+        # Play episodes in worker processes, which load the agents and
+        # models once, and checkpoint the results in episode order.
+        # Models were exported by load_models, so workers load the
+        # exports rather than exporting them concurrently.
+        if backend == NUMPY_BACKEND:
+            model_path = [get_numpy_policy_path(path) for path in model_path]
+        with Pool(workers, initializer=init_eval_worker,
+                  initargs=(agent_path, model_path, backend,
+                            cache_capacity)) as pool:
+            for history, elapsed in pool.imap(run_worker_episode,
+                                              episode_seeds):
+                episode += 1
+                time_print(f"Completed episode {episode}, elapsed episode time {elapsed}")
+
+                # Checkpoint results
+                matches = checkpoint_results(matches, history, results_path,
+                                             file_time, eval_name,
+                                             episode_seeds[episode - 1],
+                                             episode, elapsed)
+                if datetime.now() >= finish_time:
+                    break
 
     while (datetime.now() < finish_time and episode < max_episodes):
         time_print(f"Starting episode {episode}...")
-        start:datetime = datetime.now()
         
         # TODO: FIX GAME LOGGING TO HANDLE THE REVERSION.
         # Reverse the order of players halfway through training.
         #if (current_time > (current_time + timedelta(hours=(max_duration*0.5)))
         #        or episode > ((BASE_EPISODES * 0.5)-1)):
 
-        # Create game.
-        tmp_seed:float = random.random()
-        bg_rules = BackgammonRules()
-        bg_game = Game(bg_rules, agent_list, agent_path, num_agents,
-                       tmp_seed)
-        
         # Run game.
-        history = bg_game.run()
+        tmp_seed:float = episode_seeds[episode]
+        history, elapsed = run_eval_episode(agent_list, agent_path,
+                                            tmp_seed)
 
         # Store the results.
-        elapsed:datetime = datetime.now() - start
         time_print(f"Elapsed episode time {elapsed}")
         time_print("Checkpointing results...\n")
 
@@ -292,9 +460,114 @@ def eval(agent_path:list[str], agent_names:list[str],
     matches = save_results(matches, results_path, file_time,
                            eval_name)
 
+    # Report evaluation cache usage, which is only known for the
+    # agents of this process.
+    for i in range(num_agents):
+        if (workers > 1 and lockstep == 0):
+            break
+        if (type(agent_list[i]) is InferenceAgent
+            and agent_list[i].qfunction.cache is not None):
+            time_print(f"Agent {i} evaluation cache: {agent_list[i].qfunction.cache.stats()}")
+
     time_print("Evaluation Complete.")
     return True
 
+def load_models(agent_list:list[Agent], model_path:list[str],
+                backend:str = TORCH_BACKEND,
+                cache_capacity:int = 0) -> bool:
+    """load_models
+    Loads the models of the inference agents for evaluation.
+
+    Args:
+        agent_list (list[Agent]): A list of agents.
+        model_path(list[str]): A list of model paths for evaluation.
+        backend (str, optional): Inference backend for models. Defaults
+        to TORCH_BACKEND.
+        cache_capacity (int, optional): Number of position evaluations
+        cached by each model. Defaults to 0, disabling the cache.
+
+    Returns:
+        bool: Success indicator of loading the models.
+    """
+    for i in range(len(agent_list)):
+        if type(agent_list[i]) is InferenceAgent:
+            # TD Gammon NN Qfunction provided.
+            if re.search(r"(Agents/rl/tdgammon/trained_models/)(.*)", model_path[i]):
+                if backend == NUMPY_BACKEND:
+                    agent_list[i].qfunction = load_numpy_qfunction(model_path[i],
+                                                                   cache_capacity)
+                else:
+                    # NOTE: Imported here so that the NumPy backend does
+                    # not import PyTorch.
+                    from Agents.rl.tdgammon.TDGammonNN import TDGammonNNQFunction
+                    agent_list[i].qfunction = TDGammonNNQFunction(cache_capacity=cache_capacity)
+                    agent_list[i].qfunction.load_policy(model_path[i])
+                    agent_list[i].qfunction.nn.eval()
+            else:
+                return False
+    return True
+
+def run_eval_episode(agent_list:list[Agent], agent_path:list[str],
+                     episode_seed:float) -> tuple[dict, timedelta]:
+    """run_eval_episode
+    Plays an evaluation episode, seeded so that the episode does not
+    depend on the episodes played before it.
+
+    Args:
+        agent_list (list[Agent]): A list of agents.
+        agent_path(list[str]): A list of agent paths.
+        episode_seed (float): Random seed of the episode.
+
+    Returns:
+        tuple[dict, timedelta]: History of the game, and the elapsed
+        episode time.
+    """
+    start:datetime = datetime.now()
+
+    # Create game, seeding before the rules roll the opening dice.
+    random.seed(episode_seed)
+    bg_rules = BackgammonRules()
+    bg_game = Game(bg_rules, agent_list, agent_path, len(agent_list),
+                   episode_seed)
+
+    # Run game.
+    history = bg_game.run()
+    return (history, datetime.now() - start)
+
+def init_eval_worker(agent_path:list[str], model_path:list[str],
+                     backend:str = TORCH_BACKEND,
+                     cache_capacity:int = 0) -> None:
+    """init_eval_worker
+    Initialises an evaluation worker process, loading its agents and
+    models once for all of its episodes.
+
+    Args:
+        agent_path(list[str]): A list of agent paths.
+        model_path(list[str]): A list of model paths for evaluation.
+        backend (str, optional): Inference backend for models. Defaults
+        to TORCH_BACKEND.
+        cache_capacity (int, optional): Number of position evaluations
+        cached by each model. Defaults to 0, disabling the cache.
+    """
+    (agent_list, valid_game) = load_agent(agent_path)
+    assert(valid_game and load_models(agent_list, model_path, backend,
+                                      cache_capacity))
+    eval_worker.update({"agent_list":agent_list, "agent_path":agent_path})
+
+def run_worker_episode(episode_seed:float) -> tuple[dict, timedelta]:
+    """run_worker_episode
+    Plays an evaluation episode with the agents of the worker process.
+
+    Args:
+        episode_seed (float): Random seed of the episode.
+
+    Returns:
+        tuple[dict, timedelta]: History of the game, and the elapsed
+        episode time.
+    """
+    return run_eval_episode(eval_worker["agent_list"],
+                            eval_worker["agent_path"], episode_seed)
+
 # MAIN --------------------------------------------------------------- #
 
 if __name__ == "__main__":
@@ -317,10 +590,14 @@ if __name__ == "__main__":
     # Determine run-time.
     if options.train:
         train(agent_path, agent_names, results_path, name,
-              options.set_seed, max_episodes, max_duration)
+              options.set_seed, max_episodes, max_duration,
+              options.workers, options.actor_learner,
+              options.learner_batch)
     elif options.eval:
         eval(agent_path, agent_names, model_path, results_path,
-             name, options.set_seed, max_episodes, max_duration)
+             name, options.set_seed, max_episodes, max_duration,
+             options.backend, options.cache_capacity,
+             options.lockstep, options.workers)
 
     exit()
 